@@ -0,0 +1,168 @@
+"""
+Precomputed aggregate tables for generated finance data.
+
+The services recompute the same rollups from raw transactions on every
+request. These tables are folded in month by month as transactions are
+generated, so answering "spending per category per month" or "trailing
+average" becomes a lookup over months instead of a scan over transactions.
+
+Expense figures follow the services: only negative amounts count, and they
+are reported as positive totals.
+"""
+
+# Trailing window used by findSpendingOutliers (average of the 4 prior periods)
+TRAILING_PERIODS = 4
+# Rolling window that covers a calendar quarter ending in the month
+ROLLING_PERIODS = 3
+
+
+class AggregateBuilder:
+    """Accumulate per-month rollups from a stream of monthly transactions."""
+
+    def __init__(self):
+        # {month_key: {category_id: [count, total, min, max, sum_squares]}}
+        self.category_months = {}
+        # {month_key: [income, spending, transaction_count]}
+        self.months = {}
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Rebuild the running totals from previously written aggregate tables.
+
+        Only the trailing window is needed to extend the rolling averages, so
+        older months are skipped. Totals come back rounded to the cent, so
+        appended rolling figures can differ from a full rebuild by a cent.
+        """
+        builder = cls()
+        recent = sorted(row["period"] for row in tables["monthly_totals"])
+        recent = set(recent[-TRAILING_PERIODS:])
+        for row in tables["monthly_totals"]:
+            if row["period"] in recent:
+                builder.months[row["period"]] = [
+                    row["income"],
+                    row["spending"],
+                    row["transaction_count"],
+                ]
+        for row in tables["monthly_category_totals"]:
+            if row["period"] in recent:
+                builder.category_months.setdefault(row["period"], {})[
+                    row["category"]
+                ] = [
+                    row["count"],
+                    row["total"],
+                    row["min"],
+                    row["max"],
+                    row["sum_squares"],
+                ]
+        return builder
+
+    def add_transactions(self, transactions):
+        """Fold a batch of transactions into the running totals."""
+        for t in transactions:
+            month_key = t["date"][:7]
+            amount = t["amount"]
+
+            month = self.months.get(month_key)
+            if month is None:
+                month = self.months[month_key] = [0.0, 0.0, 0]
+            month[2] += 1
+
+            if amount > 0 and t["type"] == "credit":
+                month[0] += amount
+            elif amount < 0:
+                spent = -amount
+                month[1] += spent
+
+                categories = self.category_months.get(month_key)
+                if categories is None:
+                    categories = self.category_months[month_key] = {}
+                stats = categories.get(t["category"])
+                if stats is None:
+                    categories[t["category"]] = [1, spent, spent, spent, spent * spent]
+                else:
+                    stats[0] += 1
+                    stats[1] += spent
+                    stats[2] = min(stats[2], spent)
+                    stats[3] = max(stats[3], spent)
+                    stats[4] += spent * spent
+
+    def _periods(self, since):
+        return [m for m in sorted(self.months) if since is None or m >= since]
+
+    def monthly_category_totals(self, since=None):
+        """Expense count, total, min, max and sum of squares per month and category."""
+        rows = []
+        for month_key in self._periods(since):
+            if month_key not in self.category_months:
+                continue
+            for category, stats in self.category_months[month_key].items():
+                count, total, low, high, sum_squares = stats
+                rows.append(
+                    {
+                        "period": month_key,
+                        "category": category,
+                        "count": count,
+                        "total": round(total, 2),
+                        "min": round(low, 2),
+                        "max": round(high, 2),
+                        "sum_squares": round(sum_squares, 4),
+                    }
+                )
+        return rows
+
+    def monthly_totals(self, since=None):
+        """Income, spending and net per month."""
+        rows = []
+        for month_key in self._periods(since):
+            income, spending, count = self.months[month_key]
+            rows.append(
+                {
+                    "period": month_key,
+                    "income": round(income, 2),
+                    "spending": round(spending, 2),
+                    "net": round(income - spending, 2),
+                    "transaction_count": count,
+                }
+            )
+        return rows
+
+    def category_rolling_averages(self, since=None):
+        """Trailing averages and rolling totals per category, for every month.
+
+        Months without spending count as zero, as they do in the services.
+        """
+        month_keys = sorted(self.months)
+        categories = sorted(
+            {c for totals in self.category_months.values() for c in totals}
+        )
+        rows = []
+        for category in categories:
+            series = [
+                self.category_months.get(m, {}).get(category, (0, 0.0))[1]
+                for m in month_keys
+            ]
+            for i, month_key in enumerate(month_keys):
+                if since is not None and month_key < since:
+                    continue
+                trailing = series[max(0, i - TRAILING_PERIODS) : i]
+                rolling = series[max(0, i - ROLLING_PERIODS + 1) : i + 1]
+                rows.append(
+                    {
+                        "period": month_key,
+                        "category": category,
+                        "trailing_average": round(sum(trailing) / TRAILING_PERIODS, 2),
+                        "rolling_total": round(sum(rolling), 2),
+                    }
+                )
+        return rows
+
+    def tables(self, since=None):
+        """Return every aggregate table, keyed by the name it is written under.
+
+        With since set, only rows for that period and later are returned.
+        """
+        return {
+            "monthly_category_totals": self.monthly_category_totals(since),
+            "monthly_totals": self.monthly_totals(since),
+            "category_rolling_averages": self.category_rolling_averages(since),
+        }
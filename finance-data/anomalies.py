@@ -0,0 +1,84 @@
+"""
+Anomaly injection for benchmarking spending-outlier detection.
+
+A share of each month's ordinary purchases (debits that are not recurring
+payments) is altered in one of four ways, and every change is recorded as a
+ground-truth label, so a detector's precision and recall can be measured
+against a known answer:
+
+    spike           the amount is multiplied by 4-10x
+    duplicate       the charge is posted a second time, under a new ID
+    new_merchant    the purchase moves to a merchant never seen before
+    category_drift  the purchase is booked under another spending category
+
+Labels name the affected transaction and hold the original values under
+"original", so the unaltered dataset can be reconstructed from them.
+"""
+
+from collections import namedtuple
+
+ANOMALY_TYPES = ("spike", "duplicate", "new_merchant", "category_drift")
+SPIKE_RANGE = (4, 10)
+
+AnomalySettings = namedtuple("AnomalySettings", ["rate", "types"])
+
+
+def _label(transaction, kind, original):
+    return {
+        "transaction": transaction["id"],
+        "date": transaction["date"],
+        "type": kind,
+        "category": transaction["category"],
+        "amount": transaction["amount"],
+        "original": original,
+    }
+
+
+def inject_anomalies(transactions, settings, ctx, categories):
+    """Alter a share of a month's date-sorted transactions in place.
+
+    categories are the spending category IDs a drifting purchase may move
+    to. Returns the label of every injected anomaly.
+    """
+    eligible = [
+        t
+        for t in transactions
+        if t["type"] == "debit" and "recurring" not in (t.get("tags") or ())
+    ]
+    # Stochastic rounding, so small months still see anomalies at low rates
+    count = min(len(eligible), int(settings.rate * len(eligible) + ctx.rng.random()))
+    labels = []
+    duplicates = []
+    for t in ctx.rng.sample(eligible, count):
+        kind = ctx.rng.choice(settings.types)
+        if kind == "spike":
+            original = {"amount": t["amount"]}
+            t["amount"] = round(t["amount"] * ctx.rng.uniform(*SPIKE_RANGE), 2)
+            labels.append(_label(t, kind, original))
+        elif kind == "duplicate":
+            copy = dict(t, id=ctx.new_id(), tags=list(t.get("tags") or ()))
+            if t.get("merchant"):
+                copy["merchant"] = dict(t["merchant"])
+            duplicates.append(copy)
+            labels.append(_label(copy, kind, {"transaction": t["id"]}))
+        elif kind == "new_merchant":
+            merchant = t.get("merchant") or {}
+            original = {"merchant": merchant.get("name")}
+            name = f"{ctx.fake.company()} {ctx.rng.randint(100, 999)}"
+            t["merchant"] = {"name": name, "location": merchant.get("location")}
+            t["description"] = name
+            labels.append(_label(t, kind, original))
+        else:
+            original = {"category": t["category"]}
+            choices = [c for c in categories if c != t["category"]]
+            if not choices:
+                continue
+            t["category"] = ctx.rng.choice(choices)
+            labels.append(_label(t, kind, original))
+
+    if duplicates:
+        transactions.extend(duplicates)
+        # Stable, so each duplicate follows the charges already on its date
+        transactions.sort(key=lambda x: x["date"])
+    labels.sort(key=lambda label: label["date"])
+    return labels
@@ -0,0 +1,359 @@
+"""
+Benchmark harness for generate_finance_data.py.
+
+Every stage is measured on its own, in a fresh process, so peak RSS belongs
+to that stage alone:
+
+    transactions     generate_transactions_for_month (the selected engine)
+    budgets          accumulate_monthly_spending and generate_budgets
+    serialize-<fmt>  writing the transactions in one output format
+    validate         the schema.json validator on every row
+
+The input of the later stages is generated month by month outside the timed
+sections, so even a 10M-row run holds one month of rows at a time. Results
+are saved as JSON; pass an earlier results file to --compare to flag stages
+whose throughput dropped.
+
+    python benchmark.py --scales 1k,100k --output baseline.json
+    python benchmark.py --scales 1k,100k --compare baseline.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import generate_finance_data as gen
+from dates import months_after
+from fake_pools import FakePools
+from instrumentation import peak_rss_mb
+from validation import SchemaValidator
+from writers import WRITERS
+
+SCALES = {"1k": 1_000, "100k": 100_000, "10M": 10_000_000}
+# The buffered json writer holds every row, so it only runs when asked for
+DEFAULT_FORMATS = ["json-stream", "ndjson"]
+# Fixed reference date and first month, so every run generates the same rows
+AS_OF = datetime(2025, 10, 31)
+FIRST_MONTH = (2000, 1)
+LAST_YEAR = 9999
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.json")
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the finance data generator stage by stage."
+    )
+    parser.add_argument(
+        "--scales",
+        default="1k,100k,10M",
+        help="Comma-separated row counts: 1k, 100k, 10M or plain numbers",
+    )
+    parser.add_argument(
+        "--stages",
+        default=None,
+        help="Comma-separated stages to run (default: all of them)",
+    )
+    parser.add_argument(
+        "--formats",
+        default=",".join(DEFAULT_FORMATS),
+        help="Comma-separated output formats for the serialize stages",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=sorted(gen.TRANSACTION_ENGINES),
+        default="python",
+        help="Transaction sampler to benchmark",
+    )
+    parser.add_argument(
+        "--fake",
+        choices=["faker", "pools"],
+        default="faker",
+        help="Source of cities, company names and notes",
+    )
+    parser.add_argument(
+        "--ids",
+        choices=sorted(gen.ID_STRATEGIES),
+        default="seeded",
+        help="ID strategy",
+    )
+    parser.add_argument(
+        "--rows-per-month",
+        type=int,
+        default=5000,
+        help="Sampled transactions per generated month",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Base seed")
+    parser.add_argument(
+        "--output",
+        default="benchmark_results.json",
+        help="Where to save the results",
+    )
+    parser.add_argument(
+        "--compare",
+        default=None,
+        help="Earlier results file to compare throughput against",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Throughput drop (fraction) reported as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    args.scales = [parse_scale(parser, value) for value in args.scales.split(",")]
+    args.formats = args.formats.split(",")
+    unknown = [f for f in args.formats if f not in WRITERS]
+    if unknown:
+        parser.error(f"Unknown formats: {unknown}")
+    stages = ["transactions", "budgets"]
+    stages += [f"serialize-{f}" for f in args.formats]
+    stages.append("validate")
+    if args.stages is None:
+        args.stages = stages
+    else:
+        args.stages = args.stages.split(",")
+        unknown = [s for s in args.stages if s not in stages]
+        if unknown:
+            parser.error(f"Unknown stages: {unknown} (choose from {stages})")
+    if args.rows_per_month < 1:
+        parser.error("--rows-per-month must be at least 1")
+    most_months = max(rows for _, rows in args.scales) / args.rows_per_month
+    if FIRST_MONTH[0] + most_months / 12 > LAST_YEAR:
+        parser.error("--rows-per-month is too small for the largest scale")
+
+    return args
+
+
+def parse_scale(parser, value):
+    """Return (name, rows) for a scale given by name or as a row count."""
+    if value in SCALES:
+        return value, SCALES[value]
+    try:
+        rows = int(value)
+    except ValueError:
+        parser.error(f"Unknown scale {value!r} (use {', '.join(SCALES)} or a number)")
+    if rows < 1:
+        parser.error("Scales must be at least 1 row")
+    return value, rows
+
+
+def directory_size(path):
+    """Return the total size of the files under path."""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+def benchmark_user(options):
+    """Generate the tables of the single synthetic user every stage uses."""
+    ctx = gen.shard_context(
+        AS_OF,
+        options["seed"],
+        "benchmark",
+        ids=options["ids"],
+        scope=gen.id_scope(0, user_tables=True),
+    )
+    return gen.generate_user_tables(ctx)
+
+
+def iter_months(user, options, rows):
+    """Yield (period, transactions, seconds taken) until `rows` rows are out."""
+    generate_month = gen.TRANSACTION_ENGINES[options["engine"]]
+    per_month = min(rows, options["rows_per_month"])
+    year, month = FIRST_MONTH
+    # Every month yields at least per_month rows, so this many months suffice
+    schedule = gen.RecurringSchedule(
+        user["recurring_transactions"],
+        user["categories"],
+        [FIRST_MONTH, *months_after(*FIRST_MONTH, -(-rows // per_month))],
+    )
+    produced = 0
+    while produced < rows:
+        ctx = gen.shard_context(
+            AS_OF,
+            options["seed"],
+            "benchmark",
+            year,
+            month,
+            ids=options["ids"],
+            scope=gen.id_scope(0, year, month),
+        )
+        started = time.perf_counter()
+        transactions = generate_month(
+            year,
+            month,
+            user["accounts"],
+            user["categories"],
+            user["category_map"],
+            schedule.for_month(year, month),
+            per_month,
+            per_month,
+            ctx,
+            user["profile"],
+        )
+        elapsed = time.perf_counter() - started
+        produced += len(transactions)
+        yield f"{year}-{month:02d}", transactions, elapsed
+        year, month = months_after(year, month, 1)[0]
+
+
+def run_stage(stage, rows, options):
+    """Worker entry point: run one stage at one scale and measure it."""
+    if options["fake"] == "pools":
+        gen.use_fake_pools(FakePools.load())
+    user = benchmark_user(options)
+    months = iter_months(user, options, rows)
+    seconds = 0.0
+    produced = 0
+    bytes_written = None
+
+    if stage == "transactions":
+        for _, transactions, elapsed in months:
+            seconds += elapsed
+            produced += len(transactions)
+
+    elif stage == "budgets":
+        monthly_spending = {}
+        rollup = gen.budget_rollup(user["categories"])
+        for period, transactions, _ in months:
+            started = time.perf_counter()
+            gen.accumulate_monthly_spending(
+                monthly_spending, period, transactions, rollup
+            )
+            seconds += time.perf_counter() - started
+            produced += len(transactions)
+        started = time.perf_counter()
+        gen.generate_budgets(user["category_map"], monthly_spending, user["ctx"])
+        seconds += time.perf_counter() - started
+
+    elif stage == "validate":
+        with open(SCHEMA_PATH) as f:
+            validator = SchemaValidator(json.load(f))
+        started = time.perf_counter()
+        validator.begin(
+            user["accounts"], user["categories"], user["recurring_transactions"]
+        )
+        seconds += time.perf_counter() - started
+        for _, transactions, _ in months:
+            started = time.perf_counter()
+            validator.write_transactions(transactions)
+            seconds += time.perf_counter() - started
+            produced += len(transactions)
+
+    else:
+        writer_class = WRITERS[stage.removeprefix("serialize-")]
+        directory = tempfile.mkdtemp(prefix="finance-benchmark-")
+        try:
+            path = os.path.join(directory, "data" + writer_class.extension)
+            started = time.perf_counter()
+            writer = writer_class(path)
+            writer.begin(
+                user["accounts"], user["categories"], user["recurring_transactions"]
+            )
+            seconds += time.perf_counter() - started
+            for _, transactions, _ in months:
+                started = time.perf_counter()
+                writer.write_transactions(transactions)
+                seconds += time.perf_counter() - started
+                produced += len(transactions)
+            started = time.perf_counter()
+            writer.end({})
+            writer.close()
+            seconds += time.perf_counter() - started
+            bytes_written = directory_size(directory)
+        finally:
+            shutil.rmtree(directory)
+
+    return {
+        "rows": produced,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(produced / seconds) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "bytes_written": bytes_written,
+    }
+
+
+def compare(baseline, results, tolerance):
+    """Print throughput changes against a baseline and return the regressions."""
+    previous = {(r["scale"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    print("\nCompared with baseline:")
+    for result in results:
+        old = previous.get((result["scale"], result["stage"]))
+        if not old or not old["rows_per_sec"] or not result["rows_per_sec"]:
+            continue
+        change = result["rows_per_sec"] / old["rows_per_sec"] - 1
+        flag = ""
+        if change < -tolerance:
+            regressions.append(result)
+            flag = "  ⚠ regression"
+        print(f"  {result['scale']:>6} {result['stage']:<22} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    """Run every requested stage at every scale and save the results."""
+    args = parse_args(argv)
+    options = {
+        "engine": args.engine,
+        "fake": args.fake,
+        "ids": args.ids,
+        "rows_per_month": args.rows_per_month,
+        "seed": args.seed,
+    }
+
+    print("Finance Data Generator Benchmark")
+    print("=" * 50)
+    # A fresh process per stage, so peak RSS is not carried over between stages
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for scale, rows in args.scales:
+        for stage in args.stages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                measured = executor.submit(run_stage, stage, rows, options).result()
+            result = {"scale": scale, "stage": stage, **measured}
+            results.append(result)
+            written = ""
+            if result["bytes_written"] is not None:
+                written = f"  {result['bytes_written'] / 1e6:,.1f} MB written"
+            print(
+                f"  ✓ {scale:>6} {stage:<22} {result['rows_per_sec'] or 0:>12,} rows/s"
+                f"  {result['peak_rss_mb']:>8,.1f} MB peak{written}"
+            )
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print(
+                f"\n⚠ {len(regressions)} stages are more than "
+                f"{args.tolerance:.0%} slower than the baseline"
+            )
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
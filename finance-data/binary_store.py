@@ -0,0 +1,183 @@
+"""
+Fixed-width binary transaction store.
+
+A store is four files next to each other (for data.bin):
+
+    data.bin               one 64-byte record per transaction, sorted by date
+    data.bin.strings.json  the string table that record codes index into
+    data.bin.index.json    layout, and each month's first record and row count
+    data.bin.tables.json   the other tables, as with NDJSON output
+
+The sidecars keep the .bin in their names, so other formats writing to the
+same stem (data.tables.json, data.index.json) never overwrite them.
+
+Strings (category and account IDs, merchant names and locations,
+descriptions, tag lists, notes) are stored once in the string table and
+referred to by position, dates as days since 1970-01-01, and amounts as
+int64 cents. Records never need parsing: BinaryStore memory-maps data.bin
+and slices a date range out of it with a binary search, and with NumPy
+the slice is one np.frombuffer(view, dtype=numpy_dtype()) away from columns.
+"""
+
+import json
+import mmap
+import struct
+import uuid
+from datetime import date
+
+# date, amount_cents, category, account, merchant, location, description,
+# tags, notes, type, id; padded to 64 bytes so records stay aligned
+RECORD = struct.Struct("<iqIIIIIIIB16s7x")
+FIELDS = (
+    "date",
+    "amount_cents",
+    "category",
+    "account",
+    "merchant",
+    "location",
+    "description",
+    "tags",
+    "notes",
+    "type",
+    "id",
+)
+# String code of a missing value (no merchant, location or notes)
+NONE = 0xFFFFFFFF
+TYPES = ("debit", "credit")
+EPOCH = date(1970, 1, 1).toordinal()
+# Tags are stored as one string-table entry per distinct list
+TAG_SEPARATOR = ","
+
+
+def sidecar_path(path, suffix):
+    return path + suffix
+
+
+def day_number(iso_date):
+    return date.fromisoformat(iso_date).toordinal() - EPOCH
+
+
+def encode_id(value):
+    """Pack an ID into 16 bytes: a UUID's bytes, or a decimal key as an integer."""
+    if value.isdigit():
+        return int(value).to_bytes(16, "little")
+    return uuid.UUID(value).bytes
+
+
+def decode_id(raw, id_format):
+    if id_format == "int":
+        return str(int.from_bytes(raw, "little"))
+    return str(uuid.UUID(bytes=raw))
+
+
+def numpy_dtype():
+    """Return the NumPy structured dtype of a record."""
+    import numpy as np
+
+    return np.dtype(
+        {
+            "names": list(FIELDS),
+            "formats": ["<i4", "<i8"] + ["<u4"] * 7 + ["u1", "S16"],
+            "offsets": [0, 4, 12, 16, 20, 24, 28, 32, 36, 40, 41],
+            "itemsize": RECORD.size,
+        }
+    )
+
+
+class BinaryStore:
+    """Read-only, memory-mapped view of a binary transaction store."""
+
+    def __init__(self, path):
+        with open(sidecar_path(path, ".index.json")) as f:
+            self.index = json.load(f)
+        with open(sidecar_path(path, ".strings.json")) as f:
+            self.strings = json.load(f)
+        if self.index["record_size"] != RECORD.size:
+            raise ValueError(f"{path} has {self.index['record_size']}-byte records")
+        self.file = open(path, "rb")
+        self.count = self.index["rows"]
+        if self.count:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.records = memoryview(self.mmap)
+        else:
+            self.mmap = None
+            self.records = memoryview(b"")
+
+    def close(self):
+        """Unmap the file; views sliced from the store must be released first."""
+        self.records.release()
+        if self.mmap is not None:
+            self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _day(self, position):
+        return struct.unpack_from("<i", self.records, position * RECORD.size)[0]
+
+    def _first_at_or_after(self, day, low, high):
+        while low < high:
+            middle = (low + high) // 2
+            if self._day(middle) < day:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def month(self, period):
+        """Return the records of a YYYY-MM month as a memoryview."""
+        entry = self.index["months"].get(period)
+        if entry is None:
+            return self.records[0:0]
+        start = entry["start"] * RECORD.size
+        return self.records[start : start + entry["rows"] * RECORD.size]
+
+    def date_range(self, start, end):
+        """Return the records dated from start to end (inclusive) as a memoryview."""
+        months = self.index["months"]
+        # Narrow the search to the months the range touches
+        inside = [m for m in months if start[:7] <= m <= end[:7]]
+        if not inside:
+            return self.records[0:0]
+        low = months[inside[0]]["start"]
+        high = months[inside[-1]]["start"] + months[inside[-1]]["rows"]
+        first = self._first_at_or_after(day_number(start), low, high)
+        last = self._first_at_or_after(day_number(end) + 1, first, high)
+        return self.records[first * RECORD.size : last * RECORD.size]
+
+    def rows(self, records):
+        """Decode records back into transaction dicts (slow path, for checks)."""
+        strings = self.strings
+        id_format = self.index["id_format"]
+
+        def text(code):
+            return None if code == NONE else strings[code]
+
+        for values in RECORD.iter_unpack(records):
+            row = dict(zip(FIELDS, values))
+            merchant = None
+            if row["merchant"] != NONE:
+                merchant = {
+                    "name": strings[row["merchant"]],
+                    "location": text(row["location"]),
+                }
+            tags = text(row["tags"])
+            yield {
+                "id": decode_id(row["id"], id_format),
+                "date": date.fromordinal(row["date"] + EPOCH).isoformat(),
+                "description": strings[row["description"]],
+                "amount": row["amount_cents"] / 100,
+                "category": strings[row["category"]],
+                "account": strings[row["account"]],
+                "type": TYPES[row["type"]],
+                "tags": tags.split(TAG_SEPARATOR) if tags else [],
+                "merchant": merchant,
+                "notes": text(row["notes"]),
+            }
@@ -0,0 +1,48 @@
+"""
+Calendar month engine for generated finance data.
+
+Months are (year, month) pairs stepped with calendar arithmetic on a running
+month index, so ranges of any length (decades included) never skip or repeat
+a month. Each month's date strings are built once and cached, so a row's date
+is an index into a tuple rather than a datetime and a strftime call.
+"""
+
+from calendar import monthrange
+from functools import lru_cache
+
+
+def month_index(year, month):
+    """Return a running month number, so month arithmetic is integer arithmetic."""
+    return year * 12 + month - 1
+
+
+def month_from_index(index):
+    year, month = divmod(index, 12)
+    return year, month + 1
+
+
+def months_ending(end_date, count):
+    """Return the `count` complete calendar months up to end_date, oldest first.
+
+    The month of end_date itself is included only when end_date is its last
+    day, so no transaction is dated after end_date.
+    """
+    last = month_index(end_date.year, end_date.month)
+    if end_date.day < monthrange(end_date.year, end_date.month)[1]:
+        last -= 1
+    return [month_from_index(i) for i in range(last - count + 1, last + 1)]
+
+
+def months_after(year, month, count):
+    """Return the `count` calendar months that follow (year, month)."""
+    first = month_index(year, month) + 1
+    return [month_from_index(i) for i in range(first, first + count)]
+
+
+@lru_cache(maxsize=4096)
+def month_dates(year, month):
+    """Return every date of a month as a YYYY-MM-DD string; index with day - 1."""
+    prefix = f"{year:04d}-{month:02d}-"
+    return tuple(
+        f"{prefix}{day:02d}" for day in range(1, monthrange(year, month)[1] + 1)
+    )
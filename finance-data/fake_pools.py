@@ -0,0 +1,114 @@
+"""
+Pre-generated pools of fake values for the fast generation path.
+
+Faker builds every city, company name and sentence from scratch, and importing
+it adds noticeably to startup. Pools hold a bounded number of each value,
+filled once (by Faker, or from the bundled fake_pools.json) and sampled by
+index, so a row costs one RNG draw instead of a Faker call.
+
+Run this module to regenerate the bundled file:
+
+    python fake_pools.py --size 1000 --seed 42
+"""
+
+import argparse
+import json
+import os
+
+# Pools shipped with the generator, so the fast path never needs Faker
+BUNDLED_POOLS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fake_pools.json"
+)
+# Faker methods the generator calls, and the pool that replaces each one
+POOL_FIELDS = ("city", "company", "sentence")
+
+
+def new_faker(seed=None):
+    """Import Faker and create an instance, seeded when a seed is given."""
+    from faker import Faker
+
+    faker = Faker()
+    if seed is not None:
+        faker.seed_instance(seed)
+    return faker
+
+
+class LazyFaker:
+    """Stand-in for a Faker instance that imports Faker on first use."""
+
+    def __init__(self):
+        self.faker = None
+
+    def __getattr__(self, name):
+        if self.faker is None:
+            self.faker = new_faker()
+        return getattr(self.faker, name)
+
+
+class FakePools:
+    """Bounded lists of cities, company names and sentences."""
+
+    def __init__(self, pools):
+        missing = [field for field in POOL_FIELDS if not pools.get(field)]
+        if missing:
+            raise ValueError(f"Fake value pools are empty or missing: {missing}")
+        self.pools = {field: list(pools[field]) for field in POOL_FIELDS}
+
+    @classmethod
+    def build(cls, size, seed=None):
+        """Fill every pool with size values from Faker."""
+        faker = new_faker(seed)
+        return cls(
+            {
+                field: [getattr(faker, field)() for _ in range(size)]
+                for field in POOL_FIELDS
+            }
+        )
+
+    @classmethod
+    def load(cls, path=BUNDLED_POOLS):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.pools, f, indent=2)
+
+    def bind(self, rng):
+        """Return a Faker stand-in that samples these pools with rng."""
+        return PooledFaker(self, rng)
+
+
+class PooledFaker:
+    """Provide city(), company() and sentence() by drawing from pools."""
+
+    def __init__(self, pools, rng):
+        self.rng = rng
+        self.pools = pools.pools
+        self.cities = pools.pools["city"]
+        self.companies = pools.pools["company"]
+        self.sentences = pools.pools["sentence"]
+
+    def city(self):
+        return self.rng.choice(self.cities)
+
+    def company(self):
+        return self.rng.choice(self.companies)
+
+    def sentence(self):
+        return self.rng.choice(self.sentences)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate the fake value pools.")
+    parser.add_argument("--size", type=int, default=1000, help="Values per pool")
+    parser.add_argument("--seed", type=int, default=42, help="Faker seed")
+    parser.add_argument("--output", default=BUNDLED_POOLS, help="Output file")
+    args = parser.parse_args(argv)
+
+    FakePools.build(args.size, args.seed).save(args.output)
+    print(f"✓ Wrote {args.size} values per pool to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+ID strategies for generated entities.
+
+Every context draws IDs from one strategy within an ID scope. A scope packs
+what makes a stream of IDs unique (user, calendar month, and whether the
+stream belongs to the user's own tables rather than a month of
+transactions) into one integer, so shards generated in any process never
+hand out the same ID.
+
+    uuid4     random UUIDs from os.urandom (never reproduce)
+    seeded    UUIDv4 layout, drawn from the context RNG (reproducible)
+    sortable  UUIDv7 layout: month start in milliseconds, then scope and counter
+    int       decimal surrogate keys: scope and counter packed into 63 bits
+
+A strategy returns an endless iterator of ID strings, so a batch of IDs is
+one islice() away.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from itertools import chain, repeat, starmap
+
+# Bit widths of the packed scope and counter; together they fit a signed int64
+COUNTER_BITS = 24
+PERIOD_BITS = 17
+USER_BITS = 21
+
+
+def id_scope(user_index, year=None, month=None, user_tables=False):
+    """Pack a user, an optional calendar month and the stream kind into a scope.
+
+    Month shards use (user, year, month). A user's tables use user_tables=True,
+    with the month they were generated for when appending to a dataset.
+    """
+    if not 0 <= user_index < 1 << USER_BITS:
+        raise ValueError(f"User index {user_index} does not fit in an ID scope")
+    period = 0 if year is None else year * 12 + month
+    return (((user_index << 1) | user_tables) << PERIOD_BITS) | period
+
+
+def scope_month_start_ms(scope):
+    """Return the first millisecond of the scope's month (0 when it has none)."""
+    period = scope & ((1 << PERIOD_BITS) - 1)
+    if not period:
+        return 0
+    year, month = divmod(period - 1, 12)
+    start = datetime(year, month + 1, 1, tzinfo=timezone.utc)
+    return max(0, int(start.timestamp() * 1000))
+
+
+def _overflow(limit):
+    raise OverflowError(f"More than {limit} IDs requested in one ID scope")
+    yield
+
+
+def _counter(scope):
+    """Iterate over the scope's packed values, raising once they run out."""
+    limit = 1 << COUNTER_BITS
+    first = scope << COUNTER_BITS
+    return chain(range(first, first + limit), _overflow(limit))
+
+
+def _calls(function):
+    return starmap(function, repeat(()))
+
+
+def uuid4_ids(rng, scope):
+    return _calls(lambda: str(uuid.uuid4()))
+
+
+def seeded_ids(rng, scope):
+    return _calls(lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4)))
+
+
+def sortable_ids(rng, scope):
+    # 48-bit timestamp, version 7, then the 63-bit scope and counter spread
+    # over the 12 bits of rand_a and the 62 bits of rand_b (after the variant)
+    prefix = (scope_month_start_ms(scope) << 80) | (0x7 << 76) | (0b10 << 62)
+
+    def format_id(value):
+        hex_id = f"{prefix | ((value >> 62) << 64) | (value & ((1 << 62) - 1)):032x}"
+        return (
+            f"{hex_id[:8]}-{hex_id[8:12]}-{hex_id[12:16]}-"
+            f"{hex_id[16:20]}-{hex_id[20:]}"
+        )
+
+    return map(format_id, _counter(scope))
+
+
+def integer_ids(rng, scope):
+    return map(str, _counter(scope))
+
+
+ID_STRATEGIES = {
+    "uuid4": uuid4_ids,
+    "seeded": seeded_ids,
+    "sortable": sortable_ids,
+    "int": integer_ids,
+}
@@ -0,0 +1,96 @@
+"""
+Per-stage timing for generator runs.
+
+StageTimer adds up the wall time and rows of every stage of a run (user
+tables, each month of transactions, budgets, goals, serialization,
+validation) so a refresh job can save them as JSON and alert when a stage
+slows down. It can also drive a cProfile profiler around transaction
+generation, the hot loop of a run.
+"""
+
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+
+def peak_rss_mb():
+    """Return this process's peak resident set size in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _rates(totals):
+    seconds, rows = totals
+    return {
+        "seconds": round(seconds, 4),
+        "rows": rows,
+        "rows_per_sec": round(rows / seconds) if seconds and rows else None,
+    }
+
+
+class StageTimer:
+    """Accumulate wall time and rows per stage, and per generated month."""
+
+    def __init__(self, profiler=None):
+        self.started = time.perf_counter()
+        self.profiler = profiler
+        # {stage: [seconds, rows]}, in the order stages first ran
+        self.stages = {}
+        # {YYYY-MM: [seconds, rows]}, summed over users
+        self.months = {}
+
+    def add(self, name, seconds, rows=0, table=None):
+        totals = (self.stages if table is None else table).setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += rows
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; set the yielded record's "rows" to count what it made."""
+        record = {"rows": 0}
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(name, time.perf_counter() - started, record["rows"])
+
+    def timed_months(self, months):
+        """Yield a user's (year, month, transactions, ...) entries, timing each.
+
+        Months are generated on demand, so this times (and profiles) their
+        generation; in parallel mode it is the time spent waiting on workers.
+        """
+        months = iter(months)
+        while True:
+            started = time.perf_counter()
+            if self.profiler:
+                self.profiler.enable()
+            try:
+                entry = next(months)
+            except StopIteration:
+                return
+            finally:
+                if self.profiler:
+                    self.profiler.disable()
+            elapsed = time.perf_counter() - started
+            year, month, transactions = entry[:3]
+            self.add("transactions", elapsed, len(transactions))
+            self.add(f"{year}-{month:02d}", elapsed, len(transactions), self.months)
+            yield entry
+
+    def report(self, **totals):
+        """Return the timings as a JSON-ready dict, with any run totals given."""
+        return {
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            **totals,
+            "stages": {name: _rates(t) for name, t in self.stages.items()},
+            "months": {period: _rates(t) for period, t in sorted(self.months.items())},
+        }
+
+    def save(self, path, **totals):
+        with open(path, "w") as f:
+            json.dump(self.report(**totals), f, indent=2)
@@ -0,0 +1,300 @@
+"""
+Household archetype profiles for generated finance data.
+
+A profile file describes archetypes (student, family, ...) as overrides of
+the generator's built-in behaviour, plus a weight for mixing them in a
+multi-user run:
+
+    {
+      "archetypes": {
+        "student": {
+          "weight": 2,
+          "transactions_per_month": [20, 60],
+          "category_patterns": {"Restaurants": [8, 40, 0.3]},
+          "seasonality": {"Education": [3, 1, 1, 1, 1, 1, 1, 2.5, 1.5, 1, 1, 1]},
+          "recurring": {"salary": [800, 2000], "rent": [400, 900]},
+          "recurring_items": [
+            {"description": "Renters Insurance", "amount": -15,
+             "category": "Housing", "frequency": "monthly"}
+          ]
+        }
+      }
+    }
+
+Every archetype is checked when the file is loaded, so a typo fails the run
+before anything is generated rather than halfway through it. Category names
+are checked when the archetype is compiled into a GenerationProfile.
+
+    category_patterns       {category: [min, max, weight]}, merged over the defaults;
+                            weights are relative and normalised by their total
+    vendors                 [[name, kind, category]], added to the defaults
+    description_templates   {category: ["{vendor} ..."]}, merged over the defaults
+    categories              [[name, type, parent, icon, color]], added
+    accounts                [{name, type, balance: [min, max], institution,
+                              credit_limit: [choices]}], replacing the defaults
+    goals                   [{name, target_amount, current_amount, status,
+                              deadline_days, monthly_contribution}], replacing them;
+                            amounts are numbers or [min, max], status a string
+                            or a list to choose from
+    recurring               {salary|rent|gym: [min, max]}
+    recurring_items         [{description, amount, category, frequency, account,
+                              count, auto_pay}], added to the default items;
+                            amount is a number or [min, max] (negative for
+                            payments), frequency one of recurring.FREQUENCIES,
+                            account an account type (default checking), count
+                            the number of such items (default 1, {n} in the
+                            description numbers them) and auto_pay a bool
+    seasonality             {category: twelve monthly amount multipliers}
+    drift                   {category: annual change in spending, e.g. 0.04}
+    transactions_per_month  [min, max], instead of --min/--max-transactions
+"""
+
+import json
+import os
+
+from recurring import FREQUENCIES
+
+BUNDLED_PROFILES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "profiles.json"
+)
+RECURRING_KEYS = ("salary", "rent", "gym")
+RECURRING_ITEM_KEYS = {
+    "description",
+    "amount",
+    "category",
+    "frequency",
+    "account",
+    "count",
+    "auto_pay",
+}
+ACCOUNT_KEYS = {"name", "type", "balance", "institution", "currency", "credit_limit"}
+GOAL_KEYS = {
+    "name",
+    "target_amount",
+    "current_amount",
+    "status",
+    "deadline_days",
+    "monthly_contribution",
+}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_range(where, value, allow_number=False):
+    if allow_number and _is_number(value):
+        return
+    if not (
+        isinstance(value, list)
+        and len(value) == 2
+        and all(_is_number(v) for v in value)
+        and value[0] <= value[1]
+    ):
+        expected = "a number or [min, max]" if allow_number else "[min, max]"
+        raise ValueError(f"{where}: expected {expected}, got {value!r}")
+
+
+def _check_rows(where, value, width):
+    if not isinstance(value, list) or not all(
+        isinstance(row, list) and len(row) == width for row in value
+    ):
+        raise ValueError(f"{where}: expected a list of {width}-item lists")
+
+
+def _check_archetype(name, config):
+    if not isinstance(config, dict):
+        raise ValueError(f"{name}: expected an object")
+    checks = {
+        "weight": _check_weight,
+        "transactions_per_month": _check_transactions,
+        "category_patterns": _check_patterns,
+        "vendors": lambda where, v: _check_rows(where, v, 3),
+        "description_templates": _check_templates,
+        "categories": lambda where, v: _check_rows(where, v, 5),
+        "accounts": _check_accounts,
+        "goals": _check_goals,
+        "recurring": _check_recurring,
+        "recurring_items": _check_recurring_items,
+        "seasonality": _check_seasonality,
+        "drift": _check_drift,
+    }
+    for key, value in config.items():
+        if key not in checks:
+            raise ValueError(f"{name}: unknown setting {key!r}")
+        checks[key](f"{name}.{key}", value)
+
+
+def _check_weight(where, value):
+    if not _is_number(value) or value < 0:
+        raise ValueError(f"{where}: expected a number of at least 0")
+
+
+def _check_transactions(where, value):
+    _check_range(where, value)
+    if not all(isinstance(v, int) for v in value) or value[0] < 0:
+        raise ValueError(f"{where}: expected whole numbers of at least 0")
+
+
+def _check_patterns(where, value):
+    if not isinstance(value, dict):
+        raise ValueError(f"{where}: expected an object")
+    for category, pattern in value.items():
+        if not (isinstance(pattern, list) and len(pattern) == 3):
+            raise ValueError(f"{where}.{category}: expected [min, max, weight]")
+        _check_range(f"{where}.{category}", pattern[:2])
+        _check_weight(f"{where}.{category}", pattern[2])
+
+
+def _check_templates(where, value):
+    if not isinstance(value, dict) or not all(
+        isinstance(t, list) and t and all(isinstance(s, str) for s in t)
+        for t in value.values()
+    ):
+        raise ValueError(f"{where}: expected {{category: [template, ...]}}")
+
+
+def _check_accounts(where, value):
+    if not isinstance(value, list) or not value:
+        raise ValueError(f"{where}: expected a list of accounts")
+    for i, account in enumerate(value):
+        here = f"{where}[{i}]"
+        if not isinstance(account, dict):
+            raise ValueError(f"{here}: expected an object")
+        unknown = set(account) - ACCOUNT_KEYS
+        missing = {"name", "type", "balance", "institution"} - set(account)
+        if unknown or missing:
+            raise ValueError(
+                f"{here}: unknown {sorted(unknown)}, missing {sorted(missing)}"
+            )
+        _check_range(f"{here}.balance", account["balance"])
+        limits = account.get("credit_limit", [0])
+        if (
+            not isinstance(limits, list)
+            or not limits
+            or not all(map(_is_number, limits))
+        ):
+            raise ValueError(f"{here}.credit_limit: expected a list of numbers")
+    # Purchases are drawn on these two accounts
+    types = {account["type"] for account in value}
+    for required in ("checking", "credit_card"):
+        if required not in types:
+            raise ValueError(f"{where}: needs a {required} account")
+
+
+def _check_goals(where, value):
+    if not isinstance(value, list):
+        raise ValueError(f"{where}: expected a list of goals")
+    for i, goal in enumerate(value):
+        here = f"{where}[{i}]"
+        if not isinstance(goal, dict) or set(goal) != GOAL_KEYS:
+            raise ValueError(f"{here}: expected exactly {sorted(GOAL_KEYS)}")
+        for key in ("target_amount", "current_amount", "monthly_contribution"):
+            _check_range(f"{here}.{key}", goal[key], allow_number=True)
+        status = goal["status"]
+        if not isinstance(status, str) and not (
+            isinstance(status, list)
+            and status
+            and all(isinstance(s, str) for s in status)
+        ):
+            raise ValueError(f"{here}.status: expected a string or a list of them")
+        if not isinstance(goal["deadline_days"], int):
+            raise ValueError(f"{here}.deadline_days: expected a whole number")
+
+
+def _check_recurring(where, value):
+    if not isinstance(value, dict):
+        raise ValueError(f"{where}: expected an object")
+    for key, amount in value.items():
+        if key not in RECURRING_KEYS:
+            raise ValueError(f"{where}: unknown item {key!r} (use {RECURRING_KEYS})")
+        _check_range(f"{where}.{key}", amount)
+
+
+def _check_recurring_items(where, value):
+    if not isinstance(value, list):
+        raise ValueError(f"{where}: expected a list of recurring items")
+    for i, item in enumerate(value):
+        here = f"{where}[{i}]"
+        if not isinstance(item, dict):
+            raise ValueError(f"{here}: expected an object")
+        unknown = set(item) - RECURRING_ITEM_KEYS
+        missing = {"description", "amount", "category", "frequency"} - set(item)
+        if unknown or missing:
+            raise ValueError(
+                f"{here}: unknown {sorted(unknown)}, missing {sorted(missing)}"
+            )
+        for key in ("description", "category", "account"):
+            if not isinstance(item.get(key, ""), str):
+                raise ValueError(f"{here}.{key}: expected a string")
+        _check_range(f"{here}.amount", item["amount"], allow_number=True)
+        if item["frequency"] not in FREQUENCIES:
+            raise ValueError(f"{here}.frequency: expected one of {sorted(FREQUENCIES)}")
+        count = item.get("count", 1)
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            raise ValueError(f"{here}.count: expected a whole number of at least 1")
+        if not isinstance(item.get("auto_pay", True), bool):
+            raise ValueError(f"{here}.auto_pay: expected true or false")
+
+
+def _check_seasonality(where, value):
+    if not isinstance(value, dict):
+        raise ValueError(f"{where}: expected an object")
+    for category, factors in value.items():
+        if not (
+            isinstance(factors, list)
+            and len(factors) == 12
+            and all(_is_number(f) and f > 0 for f in factors)
+        ):
+            raise ValueError(
+                f"{where}.{category}: expected twelve positive monthly multipliers"
+            )
+
+
+def _check_drift(where, value):
+    if not isinstance(value, dict):
+        raise ValueError(f"{where}: expected an object")
+    for category, rate in value.items():
+        if not _is_number(rate) or rate <= -1:
+            raise ValueError(f"{where}.{category}: expected a rate above -1")
+
+
+def load_profiles(path, mix=None):
+    """Load and check a profile file; return {archetype: (weight, config)}.
+
+    mix ({archetype: weight}) overrides the file's weights, and leaves out
+    every archetype it does not name.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    archetypes = data.get("archetypes") if isinstance(data, dict) else None
+    if not isinstance(archetypes, dict) or not archetypes:
+        raise ValueError(f'{path}: expected an object with an "archetypes" object')
+    for name, config in archetypes.items():
+        _check_archetype(name, config)
+
+    profiles = {
+        name: (config.get("weight", 1), config) for name, config in archetypes.items()
+    }
+    if mix is not None:
+        unknown = [name for name in mix if name not in profiles]
+        if unknown:
+            raise ValueError(f"Unknown archetypes in the mix: {unknown}")
+        profiles = {name: (weight, profiles[name][1]) for name, weight in mix.items()}
+    if not sum(weight for weight, _ in profiles.values()) > 0:
+        raise ValueError("Archetype weights must add up to more than 0")
+    return profiles
+
+
+def parse_mix(value):
+    """Parse "student=1,family=3" into {archetype: weight}."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        try:
+            mix[name.strip()] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Bad archetype weight in {part!r}") from None
+        if mix[name.strip()] < 0:
+            raise ValueError(f"Archetype weights must be at least 0: {part!r}")
+    return mix
@@ -0,0 +1,151 @@
+"""
+Recurring transaction scheduler.
+
+A recurring item repeats at its frequency, anchored on its next_date, both
+forward and back in time. Each item is expanded once into the dates it falls
+on within the generated months, bucketed by month, so a month's recurring
+rows cost one step per occurrence however many items a user has.
+
+    daily, weekly, biweekly   every 1, 7 or 14 days from next_date
+    monthly, quarterly        every 1 or 3 months, on next_date's day
+    annual (or yearly)        every 12 months, on next_date's day
+
+Month-based items due on a day a month lacks (the 31st, say) fall on its
+last day instead.
+
+How an occurrence is booked (credit or debit, tags, merchant, notes) follows
+from the item's category, and is worked out once per item too.
+"""
+
+from collections import namedtuple
+from datetime import date, timedelta
+
+from dates import month_dates, month_from_index, month_index
+
+# Frequency name: (unit, step)
+FREQUENCIES = {
+    "daily": ("days", 1),
+    "weekly": ("days", 7),
+    "biweekly": ("days", 14),
+    "monthly": ("months", 1),
+    "quarterly": ("months", 3),
+    "annual": ("months", 12),
+    "yearly": ("months", 12),
+}
+
+# How items of a category are booked: type, tag, merchant name and notes.
+# Other items are deposits when positive, else subscriptions named after
+# the first word of their description.
+BOOKINGS = {
+    "Salary": ("credit", "salary", None, "Automatic salary deposit"),
+    "Rent": ("debit", "rent", "Property Management Co", "Monthly rent payment"),
+    "Payroll": ("debit", "payroll", None, "Automatic payroll payment"),
+}
+DEPOSIT = ("credit", "income", None, "Automatic deposit")
+SUBSCRIPTION = ("debit", "subscription", None, "Automatic subscription payment")
+
+RecurringItem = namedtuple(
+    "RecurringItem",
+    [
+        "description",
+        "amount",
+        "category",
+        "account",
+        "type",
+        "tags",
+        "merchant",
+        "located",
+        "notes",
+    ],
+)
+
+
+def booking(item, category_name):
+    """Return the RecurringItem an occurrence of item is booked from."""
+    default = DEPOSIT if item["amount"] > 0 else SUBSCRIPTION
+    kind, tag, merchant, notes = BOOKINGS.get(category_name, default)
+    # A landlord is somewhere in town; a subscription is named after itself
+    located = merchant is not None
+    if tag == "subscription":
+        merchant = item["description"].split()[0]
+    return RecurringItem(
+        item["description"],
+        item["amount"],
+        item["category"],
+        item["account"],
+        kind,
+        ("recurring", tag),
+        merchant,
+        located,
+        notes,
+    )
+
+
+def _frequency(frequency):
+    try:
+        return FREQUENCIES[frequency]
+    except KeyError:
+        raise ValueError(f"Unknown recurring frequency {frequency!r}") from None
+
+
+def first_due_date(frequency, after, rng):
+    """Return a random due date within one period after `after`, as YYYY-MM-DD."""
+    unit, step = _frequency(frequency)
+    days = step if unit == "days" else round(step * 365 / 12)
+    return (after + timedelta(days=rng.randint(1, days))).strftime("%Y-%m-%d")
+
+
+def occurrence_days(frequency, anchor, first, last):
+    """Yield (year, month, day) of every occurrence from month first to last.
+
+    anchor is the item's next_date as a date; first and last are
+    (year, month) pairs.
+    """
+    unit, step = _frequency(frequency)
+    start = month_index(*first)
+    end = month_index(*last)
+
+    if unit == "days":
+        start_day = date(*first, 1).toordinal()
+        end_day = date(*last, len(month_dates(*last))).toordinal()
+        # First occurrence on or after start_day, stepping from the anchor
+        day = anchor.toordinal()
+        day += -((day - start_day) // step) * step
+        while day <= end_day:
+            d = date.fromordinal(day)
+            yield d.year, d.month, d.day
+            day += step
+    else:
+        index = start + (month_index(anchor.year, anchor.month) - start) % step
+        while index <= end:
+            year, month = month_from_index(index)
+            yield year, month, min(anchor.day, len(month_dates(year, month)))
+            index += step
+
+
+class RecurringSchedule:
+    """Occurrences of a user's recurring items over a set of months."""
+
+    def __init__(self, recurring_transactions, categories, months):
+        self.by_month = {}
+        if not months:
+            return
+        wanted = set(months)
+        first, last = min(wanted), max(wanted)
+        names = {c["id"]: c["name"] for c in categories}
+        for item in recurring_transactions:
+            booked = booking(item, names.get(item["category"]))
+            anchor = date.fromisoformat(item["next_date"])
+            for year, month, day in occurrence_days(
+                item["frequency"], anchor, first, last
+            ):
+                if (year, month) in wanted:
+                    self.by_month.setdefault((year, month), []).append(
+                        (month_dates(year, month)[day - 1], booked)
+                    )
+        for occurrences in self.by_month.values():
+            occurrences.sort(key=lambda occurrence: occurrence[0])
+
+    def for_month(self, year, month):
+        """Return the month's (date, RecurringItem) occurrences in date order."""
+        return self.by_month.get((year, month), [])
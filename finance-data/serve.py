@@ -0,0 +1,412 @@
+"""
+Serve a generated dataset from memory over local HTTP.
+
+The dataset is loaded once and kept resident, with transactions sorted by
+date so a date range is two binary searches away. Queries are plain GET
+requests answered with JSON:
+
+    /transactions  start, end, category, account, limit
+                   transactions dated from start to end (inclusive)
+    /aggregate     start, end, by=category|month|account|day
+                   income, spending, net and count per group
+    /categories    start, end
+                   every category with its spending and count
+    /category      name (or id), start, end
+                   one category's spending per month, for trends
+    /status        source, rows, reloads and cache statistics
+
+Dates are YYYY-MM-DD, or YYYY-MM for a whole month, and every parameter is
+optional except /category's name. Recent responses are kept in an LRU cache
+as encoded bytes, so a repeated query skips both the scan and JSON
+encoding; other queries run in a thread, so a slow scan does not hold up
+the connections waiting behind it. The source files are polled in the
+background; once a change has settled for a poll, the dataset is reloaded
+in a thread and swapped in, and the cache cleared.
+"""
+
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+
+from binary_store import BinaryStore, sidecar_path
+from writers import WRITERS, CompressedNdjsonWriter, NdjsonWriter
+
+COMPACT = (",", ":")
+GROUPINGS = {
+    "category": lambda t, names: names.get(t["category"], t["category"]),
+    "month": lambda t, names: t["date"][:7],
+    "account": lambda t, names: t["account"],
+    "day": lambda t, names: t["date"],
+}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class QueryError(ValueError):
+    """A bad query; answered with status 400 and the message."""
+
+
+def _compressed_writer(path):
+    for writer_class in WRITERS.values():
+        if issubclass(writer_class, CompressedNdjsonWriter) and path.endswith(
+            writer_class.extension
+        ):
+            return writer_class
+    return None
+
+
+def source_files(path):
+    """Return the files a dataset is read from, which a reload watches."""
+    if path.endswith(".bin"):
+        return [path] + [
+            sidecar_path(path, suffix)
+            for suffix in (".index.json", ".strings.json", ".tables.json")
+        ]
+    writer_class = _compressed_writer(path)
+    if writer_class:
+        return [
+            path,
+            writer_class.sidecar_path(path),
+            writer_class.sidecar_path(path, ".index.json"),
+        ]
+    if path.endswith(".ndjson"):
+        return [path, NdjsonWriter.sidecar_path(path)]
+    return [path]
+
+
+def can_load(path):
+    return path.endswith((".json", ".ndjson", ".bin")) or bool(_compressed_writer(path))
+
+
+def load_tables(path):
+    """Read a dataset written in any of the file formats into {table: rows}."""
+    if path.endswith(".bin"):
+        with open(sidecar_path(path, ".tables.json")) as f:
+            tables = json.load(f)
+        with BinaryStore(path) as store:
+            tables["transactions"] = list(store.rows(store.records))
+        return tables
+    writer_class = _compressed_writer(path)
+    if writer_class:
+        with open(writer_class.sidecar_path(path)) as f:
+            tables = json.load(f)
+        tables["transactions"] = list(writer_class.read_months(path))
+        return tables
+    if path.endswith(".ndjson"):
+        with open(NdjsonWriter.sidecar_path(path)) as f:
+            tables = json.load(f)
+        with open(path) as f:
+            tables["transactions"] = [json.loads(line) for line in f if line.strip()]
+        return tables
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+    raise ValueError(f"Cannot serve {path}: use a JSON, NDJSON or binary dataset")
+
+
+class Dataset:
+    """One loaded dataset, indexed for date-range queries."""
+
+    def __init__(self, tables):
+        self.transactions = sorted(tables["transactions"], key=lambda t: t["date"])
+        self.dates = [t["date"] for t in self.transactions]
+        self.categories = tables.get("categories", [])
+        self.category_names = {c["id"]: c["name"] for c in self.categories}
+        self.category_ids = {c["name"]: c["id"] for c in self.categories}
+        self.loaded_at = time.time()
+
+    def between(self, start=None, end=None):
+        """Return the transactions dated from start to end, inclusive."""
+        low = bisect_left(self.dates, start) if start else 0
+        # "~" sorts after any date with end as a prefix, so end may be a month
+        high = bisect_right(self.dates, end + "~") if end else len(self.dates)
+        return self.transactions[low:high]
+
+    def category_id(self, value):
+        if value in self.category_names:
+            return value
+        if value in self.category_ids:
+            return self.category_ids[value]
+        raise QueryError(f"Unknown category: {value}")
+
+
+def _totals():
+    return {"income": 0.0, "spending": 0.0, "net": 0.0, "count": 0}
+
+
+def _add(totals, transaction):
+    amount = transaction["amount"]
+    if amount >= 0:
+        totals["income"] += amount
+    else:
+        totals["spending"] -= amount
+    totals["net"] += amount
+    totals["count"] += 1
+
+
+def _rounded(totals):
+    return {key: round(value, 2) for key, value in totals.items()}
+
+
+def query_transactions(dataset, params):
+    rows = dataset.between(params.get("start"), params.get("end"))
+    if "category" in params:
+        category = dataset.category_id(params["category"])
+        rows = [t for t in rows if t["category"] == category]
+    if "account" in params:
+        rows = [t for t in rows if t["account"] == params["account"]]
+    total = len(rows)
+    if "limit" in params:
+        try:
+            limit = int(params["limit"])
+        except ValueError:
+            raise QueryError("limit must be a whole number") from None
+        if limit < 0:
+            raise QueryError("limit must not be negative")
+        rows = rows[:limit]
+    return {"count": total, "transactions": rows}
+
+
+def query_aggregate(dataset, params):
+    by = params.get("by", "category")
+    if by not in GROUPINGS:
+        raise QueryError(f"by must be one of {sorted(GROUPINGS)}")
+    key = GROUPINGS[by]
+    groups = {}
+    overall = _totals()
+    for t in dataset.between(params.get("start"), params.get("end")):
+        group = key(t, dataset.category_names)
+        if group not in groups:
+            groups[group] = _totals()
+        _add(groups[group], t)
+        _add(overall, t)
+    return {
+        "by": by,
+        "total": _rounded(overall),
+        "groups": {name: _rounded(groups[name]) for name in sorted(groups)},
+    }
+
+
+def query_categories(dataset, params):
+    totals = {c["id"]: _totals() for c in dataset.categories}
+    for t in dataset.between(params.get("start"), params.get("end")):
+        if t["category"] in totals:
+            _add(totals[t["category"]], t)
+    return {
+        "categories": [
+            {
+                "id": c["id"],
+                "name": c["name"],
+                "type": c.get("type"),
+                "parent": c.get("parent"),
+                **_rounded(totals[c["id"]]),
+            }
+            for c in dataset.categories
+        ]
+    }
+
+
+def query_category(dataset, params):
+    if "name" not in params and "id" not in params:
+        raise QueryError("name or id is required")
+    category = dataset.category_id(params.get("id") or params["name"])
+    months = {}
+    overall = _totals()
+    for t in dataset.between(params.get("start"), params.get("end")):
+        if t["category"] == category:
+            period = t["date"][:7]
+            if period not in months:
+                months[period] = _totals()
+            _add(months[period], t)
+            _add(overall, t)
+    return {
+        "id": category,
+        "name": dataset.category_names[category],
+        "total": _rounded(overall),
+        "months": {period: _rounded(months[period]) for period in sorted(months)},
+    }
+
+
+QUERIES = {
+    "/transactions": query_transactions,
+    "/aggregate": query_aggregate,
+    "/categories": query_categories,
+    "/category": query_category,
+}
+
+
+class DataServer:
+    """Answer queries over one dataset, reloading it when its files change."""
+
+    def __init__(self, path, cache_size=256, reload_interval=1.0):
+        self.path = path
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.cache = OrderedDict()
+        self.hits = self.misses = self.reloads = 0
+        self.signature = self._signature()
+        self.pending = None
+        self.dataset = Dataset(load_tables(path))
+
+    def _signature(self):
+        signature = []
+        for name in source_files(self.path):
+            try:
+                stat = os.stat(name)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def status(self):
+        return {
+            "source": self.path,
+            "rows": len(self.dataset.transactions),
+            "loaded_at": self.dataset.loaded_at,
+            "reloads": self.reloads,
+            "cache": {
+                "size": len(self.cache),
+                "capacity": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            },
+        }
+
+    async def respond(self, target):
+        """Return (status, JSON body bytes) for a request target."""
+        url = urlsplit(target)
+        if url.path == "/status":
+            return 200, json.dumps(self.status(), separators=COMPACT).encode()
+        query = QUERIES.get(url.path)
+        if query is None:
+            return 404, _error(f"Unknown query: {url.path}")
+        params = dict(parse_qsl(url.query))
+        key = (url.path, tuple(sorted(params.items())))
+        body = self.cache.get(key)
+        if body is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return 200, body
+        self.misses += 1
+        # Run like a reload, off the event loop; a reload may swap the
+        # dataset meanwhile, so the answer is only cached if it did not
+        dataset = self.dataset
+        loop = asyncio.get_running_loop()
+        try:
+            body = await loop.run_in_executor(None, _answer, query, dataset, params)
+        except QueryError as e:
+            return 400, _error(str(e))
+        if self.cache_size and dataset is self.dataset:
+            self.cache[key] = body
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return 200, body
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection, keeping it open between them."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    break
+                method, target, version = parts
+                if method == "GET":
+                    status, body = await self.respond(target)
+                else:
+                    status, body = 405, _error("Only GET is supported")
+                keep_alive = (
+                    version == "HTTP/1.1" and headers.get("connection") != "close"
+                )
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch(self):
+        """Reload the dataset once its files have changed and then settled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            signature = self._signature()
+            if signature == self.signature:
+                self.pending = None
+                continue
+            # A writer may still be busy; wait until a poll sees no change
+            if signature != self.pending:
+                self.pending = signature
+                continue
+            try:
+                tables = await loop.run_in_executor(None, load_tables, self.path)
+                dataset = Dataset(tables)
+            except (OSError, ValueError) as e:
+                print(
+                    f"⚠ Reload of {self.path} failed, still serving the old data: {e}"
+                )
+                self.pending = None
+                continue
+            self.dataset = dataset
+            self.cache.clear()
+            self.signature = signature
+            self.pending = None
+            self.reloads += 1
+            print(f"✓ Reloaded {self.path}: {len(dataset.transactions)} transactions")
+
+    async def serve(self, address):
+        if address.startswith("unix:"):
+            socket_path = address.removeprefix("unix:")
+            server = await asyncio.start_unix_server(self.handle, socket_path)
+        else:
+            host, _, port = address.rpartition(":")
+            server = await asyncio.start_server(self.handle, host or "127.0.0.1", port)
+        print(f"✓ Serving {self.path} on {address} (Ctrl+C to stop)")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.watch())
+
+
+def _answer(query, dataset, params):
+    return json.dumps(query(dataset, params), separators=COMPACT).encode()
+
+
+def _error(message):
+    return json.dumps({"error": message}, separators=COMPACT).encode()
+
+
+def serve(path, address, cache_size=256, reload_interval=1.0):
+    """Load the dataset at path and serve it on address until interrupted.
+
+    address is HOST:PORT, :PORT or PORT for local HTTP over TCP, or
+    unix:PATH for a Unix socket.
+    """
+    server = DataServer(path, cache_size, reload_interval)
+    print(f"✓ Loaded {len(server.dataset.transactions)} transactions from {path}")
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        print("\n✓ Server stopped")
+    finally:
+        if address.startswith("unix:") and os.path.exists(address[5:]):
+            os.remove(address[5:])
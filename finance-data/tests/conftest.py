@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "generate_finance_data.py",
+)
+
+
+@pytest.fixture
+def generate(tmp_path):
+    """Run the generator in a process of its own inside a temporary directory.
+
+    A fresh process per run matters: the module seeds the global RNG on import.
+    """
+
+    def run(*argv):
+        subprocess.run(
+            [sys.executable, SCRIPT, *map(str, argv)],
+            cwd=tmp_path,
+            check=True,
+            capture_output=True,
+        )
+        return tmp_path
+
+    return run
@@ -0,0 +1,44 @@
+import json
+import subprocess
+from collections import defaultdict
+
+import pytest
+
+BASE = ["--users", 2, "--months", 3, "--as-of", "2025-05-31", "--ids", "seeded"]
+BASE += ["--format", "ndjson", "--output-dir", "out"]
+
+
+def read_ndjson(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def sampled_rows_by_month(rows):
+    months = defaultdict(set)
+    for t in rows:
+        if "recurring" not in t["tags"]:
+            months[t["date"][:7]].add((t["date"][8:], t["amount"], t["description"]))
+    return months
+
+
+def test_appends_generate_new_transactions(generate):
+    out = generate(*BASE)
+    generate(*BASE, "--append", 1)
+    generate(*BASE, "--append", 1)
+
+    rows = read_ndjson(out / "out" / "user-0.ndjson")
+    ids = [t["id"] for t in rows]
+    assert len(ids) == len(set(ids))
+    months = sampled_rows_by_month(rows)
+    assert sorted(months) == ["2025-03", "2025-04", "2025-05", "2025-06", "2025-07"]
+    assert not months["2025-06"] & months["2025-07"]
+
+
+@pytest.mark.parametrize("flag", [["--aggregates"], ["--balances", "monthly"]])
+def test_append_rejects_tables_the_dataset_lacks(generate, flag):
+    out = generate(*BASE)
+    with pytest.raises(subprocess.CalledProcessError) as failed:
+        generate(*BASE, "--append", 1, *flag)
+    assert b"Cannot append with " + flag[0].encode() in failed.value.stderr
+    rows = read_ndjson(out / "out" / "user-0.ndjson")
+    assert max(t["date"] for t in rows) < "2025-06"
@@ -0,0 +1,16 @@
+from serve import load_tables, source_files
+
+RUN = ["--months", 2, "--as-of", "2025-05-31", "--output"]
+
+
+def test_other_formats_leave_binary_sidecars_alone(generate):
+    out = generate(*RUN, "data.bin", "--format", "binary")
+    binary = load_tables(str(out / "data.bin"))
+    generate(*RUN, "data.ndjson", "--format", "ndjson")
+    generate(*RUN, "data.ndjson.gz", "--format", "ndjson-gzip")
+
+    assert load_tables(str(out / "data.bin")) == binary
+    assert all(
+        path.startswith(str(out / "data.bin"))
+        for path in source_files(str(out / "data.bin"))
+    )
@@ -0,0 +1,27 @@
+import os
+import shutil
+
+import pytest
+
+SCHEMA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema.json"
+)
+BASE = ["--users", 3, "--months", 2, "--as-of", "2025-10-31", "--anomaly-rate", 0.05]
+
+
+def read_bytes(directory):
+    return {
+        name: (directory / name).read_bytes() for name in sorted(os.listdir(directory))
+    }
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "ndjson-gzip", "json-stream", "binary"])
+def test_output_does_not_depend_on_worker_count(generate, tmp_path, fmt):
+    # With a schema present the workers validate too
+    shutil.copy(SCHEMA, tmp_path)
+    generate(*BASE, "--format", fmt, "--workers", 1, "--output-dir", "one")
+    generate(*BASE, "--format", fmt, "--workers", 3, "--output-dir", "three")
+
+    one = read_bytes(tmp_path / "one")
+    assert one
+    assert one == read_bytes(tmp_path / "three")
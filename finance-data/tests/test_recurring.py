@@ -0,0 +1,51 @@
+import json
+import random
+from datetime import datetime
+
+import pytest
+
+import generate_finance_data as gen
+from profiles import load_profiles
+from recurring import RecurringSchedule
+
+WEEKLY = {
+    "description": "Cleaner {n}",
+    "amount": [-90, -60],
+    "category": "Housing",
+    "frequency": "weekly",
+    "count": 3,
+}
+
+
+def test_profile_recurring_items_are_generated_and_scheduled():
+    ctx = gen.GenerationContext(random.Random(1), None, datetime(2025, 5, 31))
+    profile = gen.DEFAULT_PROFILE.with_config("cleaned", {"recurring_items": [WEEKLY]})
+    user = gen.generate_user_tables(ctx, profile=profile)
+
+    items = user["recurring_transactions"][-3:]
+    assert [item["description"] for item in items] == [
+        f"Cleaner {n}" for n in (1, 2, 3)
+    ]
+    schedule = RecurringSchedule(items, user["categories"], [(2025, 6)])
+    assert len(schedule.for_month(2025, 6)) in (12, 15)
+
+
+def test_profiles_reject_unknown_frequencies(tmp_path):
+    path = tmp_path / "profiles.json"
+    item = {**WEEKLY, "frequency": "fortnightly"}
+    path.write_text(json.dumps({"archetypes": {"a": {"recurring_items": [item]}}}))
+    with pytest.raises(ValueError, match="frequency"):
+        load_profiles(path)
+
+
+def test_default_profile_keeps_the_default_items():
+    ctx = gen.GenerationContext(random.Random(1), None, datetime(2025, 5, 31))
+    user = gen.generate_user_tables(ctx)
+
+    assert [item["description"] for item in user["recurring_transactions"]] == [
+        "Monthly Salary",
+        "Rent Payment",
+        "Netflix Subscription",
+        "Spotify Premium",
+        "Gym Membership",
+    ]
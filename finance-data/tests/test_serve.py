@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+import pytest
+
+from serve import DataServer, Dataset, QueryError, query_transactions
+
+TABLES = {
+    "categories": [{"id": "c1", "name": "Food", "type": "expense"}],
+    "transactions": [
+        {"id": f"t{day}", "date": f"2025-06-{day:02d}", "amount": -day}
+        | {"category": "c1", "account": "a1"}
+        for day in range(1, 6)
+    ],
+}
+
+
+@pytest.mark.parametrize("limit", ["-1", "two"])
+def test_bad_limit_is_rejected(limit):
+    with pytest.raises(QueryError):
+        query_transactions(Dataset(TABLES), {"limit": limit})
+
+
+def test_limit_keeps_the_total():
+    result = query_transactions(Dataset(TABLES), {"limit": "2", "end": "2025-06-04"})
+    assert result["count"] == 4
+    assert [t["id"] for t in result["transactions"]] == ["t1", "t2"]
+
+
+def test_responses_are_cached(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(TABLES))
+    server = DataServer(str(path))
+
+    async def queries():
+        first = await server.respond("/transactions?limit=1")
+        second = await server.respond("/transactions?limit=1")
+        bad = await server.respond("/transactions?limit=-1")
+        return first, second, bad
+
+    first, second, bad = asyncio.run(queries())
+    assert first == second
+    assert json.loads(first[1])["transactions"][0]["id"] == "t1"
+    assert bad[0] == 400
+    assert (server.hits, server.misses) == (1, 2)
+    assert len(server.cache) == 1
@@ -0,0 +1,128 @@
+import json
+import os
+
+import pytest
+
+from validation import SchemaValidator, compile_schema
+
+SCHEMA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema.json"
+)
+
+ROW = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "amount": {"type": "number"},
+        "count": {"type": "integer"},
+        "paid": {"type": "boolean"},
+        "kind": {"type": "string", "enum": ["debit", "credit"]},
+        "period": {"type": "string", "pattern": "^[0-9]{4}-(0[1-9]|1[0-2])$"},
+        "date": {"type": "string", "format": "date"},
+        "stamp": {"type": "string", "format": "date-time"},
+        "account": {"type": "string", "x-references": "accounts"},
+        "parent": {"type": ["string", "null"], "x-references": "accounts"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "merchant": {
+            "type": ["object", "null"],
+            "properties": {"name": {"type": "string"}},
+            "required": ["name"],
+        },
+        "notes": {"type": "string"},
+    },
+    "required": ["id", "amount", "account"],
+}
+
+VALID = {
+    "id": "t1",
+    "amount": -12.5,
+    "count": 3,
+    "paid": True,
+    "kind": "debit",
+    "period": "2025-06",
+    "date": "2025-06-30",
+    "stamp": "2025-06-30T12:00:00",
+    "account": "a1",
+    "parent": None,
+    "tags": ["food"],
+    "merchant": {"name": "Cafe"},
+}
+
+
+@pytest.fixture
+def check():
+    return compile_schema(ROW, {"accounts": {"a1", "a2"}})
+
+
+def test_valid_row_passes(check):
+    assert check(VALID) is None
+    assert check({"id": "t2", "amount": 7, "account": "a2"}) is None
+
+
+@pytest.mark.parametrize(
+    "field, value, error",
+    [
+        ("id", 5, "id: expected string, got int"),
+        ("amount", "12", "amount: expected number, got str"),
+        ("amount", True, "amount: expected number, got bool"),
+        ("count", 1.5, "count: expected integer, got float"),
+        ("count", False, "count: expected integer, got bool"),
+        ("paid", 1, "paid: expected boolean, got int"),
+        ("kind", "refund", "kind: 'refund' is not one of ['credit', 'debit']"),
+        ("period", "2025-13", "period: '2025-13' does not match "),
+        ("date", "2025-02-30", "date: '2025-02-30' is not a valid date"),
+        ("date", "30/06/2025", "date: '30/06/2025' is not a valid date"),
+        ("stamp", "yesterday", "stamp: 'yesterday' is not a valid date-time"),
+        ("account", "a9", "account: 'a9' is not a known accounts ID"),
+        ("parent", "a9", "parent: 'a9' is not a known accounts ID"),
+        ("tags", ["ok", 3], "tags[]: expected string, got int"),
+        ("merchant", {}, "merchant: missing name"),
+        ("notes", 0, "notes: expected string, got int"),
+    ],
+)
+def test_invalid_field_is_reported(check, field, value, error):
+    assert check({**VALID, field: value}).startswith(error)
+
+
+@pytest.mark.parametrize("field", ["id", "amount", "account"])
+def test_required_fields(check, field):
+    row = {k: v for k, v in VALID.items() if k != field}
+    assert check(row) == f"row: missing {field}"
+    assert check({**VALID, field: None}) is not None
+
+
+@pytest.mark.parametrize("field", ["parent", "merchant", "notes", "tags"])
+def test_optional_fields_may_be_absent_or_null(check, field):
+    assert check({k: v for k, v in VALID.items() if k != field}) is None
+    assert check({**VALID, field: None}) is None
+
+
+def test_non_object_row(check):
+    assert check([]) == "row: expected object, got list"
+
+
+def test_references_follow_the_current_user():
+    with open(SCHEMA) as f:
+        schema = json.load(f)
+    validator = SchemaValidator(schema)
+    account = {"id": "a1", "name": "Checking", "type": "checking", "balance": 1}
+    account.update(currency="USD", institution="Bank")
+    category = {"id": "c1", "name": "Food", "type": "expense", "icon": "", "color": ""}
+    transaction = {"id": "t1", "date": "2025-06-01", "description": "Lunch"}
+    transaction.update(amount=-9.5, category="c1", account="a1", type="debit")
+
+    validator.begin([account], [category], [])
+    assert validator.write_transactions([transaction]) == 0
+    validator.begin([{**account, "id": "a2"}], [category], [])
+    assert validator.write_transactions([transaction]) == 1
+    assert validator.errors == [
+        "transactions t1: account: 'a1' is not a known accounts ID"
+    ]
+
+    # A worker's counts and errors add up in the parent's validator
+    checked = validator.checked
+    worker = SchemaValidator(schema)
+    result = worker.check_shard([account], [category], [transaction] * 3)
+    assert result == (3, 0, [])
+    assert validator.merge(*result) == 0
+    assert (validator.checked, validator.invalid) == (checked + 3, 1)
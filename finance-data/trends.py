@@ -0,0 +1,91 @@
+"""
+Seasonality, long-run drift and inflation for generated transactions.
+
+Without them every month draws from the same ranges, so category trends and
+year-over-year or quarter-over-quarter comparisons only ever see noise.
+Trends turns a profile's settings into one factor array per month of a run,
+computed once up front:
+
+    amounts  a multiplier per category position, for the month's seasonal
+             curve times drift and inflation compounded from BASE_PERIOD
+    count    a multiplier of the month's transaction count range
+
+The generators multiply a month's sampled amounts by its array in one pass
+(one NumPy fancy-indexed multiply in the batch engine) rather than working
+out a factor per row. Recurring payments keep their fixed amounts.
+"""
+
+from collections import namedtuple
+
+# Generated amounts are in prices of this month; earlier months are deflated
+# and later ones inflated, so appended months line up with earlier runs
+BASE_PERIOD = (2024, 1)
+DEFAULT_INFLATION = 0.03
+
+# Built-in curves, used with --trends; a profile's own override them
+SEASONALITY = {
+    "Groceries": [1, 0.95, 1, 1, 1, 1, 1, 1, 1, 1, 1.1, 1.2],
+    "Restaurants": [0.85, 0.9, 1, 1, 1.05, 1.1, 1.1, 1.05, 1, 1, 1, 1.2],
+    "Shopping": [0.8, 0.8, 0.9, 0.9, 1, 1, 1, 1.2, 1, 1, 1.4, 1.9],
+    "Entertainment": [0.8, 0.85, 1, 1, 1.05, 1.3, 1.4, 1.3, 0.9, 0.9, 1, 1.2],
+    "Gas": [0.9, 0.9, 0.95, 1, 1.05, 1.15, 1.2, 1.15, 1, 0.95, 0.9, 0.95],
+    "Bills & Utilities": [1.3, 1.25, 1.1, 0.95, 0.9, 1, 1.15, 1.15, 0.95, 0.9, 1, 1.2],
+    "Healthcare": [1.3, 1.1, 1, 1, 0.95, 0.9, 0.9, 0.95, 1, 1, 1, 1.1],
+    "Education": [1.4, 1, 0.9, 0.9, 0.9, 0.6, 0.6, 1.8, 1.5, 1, 0.9, 0.8],
+}
+# Annual change in real spending per category, on top of inflation
+DRIFT = {
+    "Restaurants": 0.04,
+    "Entertainment": 0.03,
+    "Shopping": 0.02,
+    "Public Transit": -0.03,
+    "Gas": -0.02,
+}
+# More purchases around the holidays, fewer after them
+COUNT_SEASONALITY = [0.9, 0.88, 0.97, 0.98, 1.0, 1.02, 1.03, 1.02, 0.98, 1.0, 1.08, 1.2]
+COUNT_DRIFT = 0.02
+
+MonthTrend = namedtuple("MonthTrend", ["count", "amounts"])
+
+
+def months_from_base(year, month):
+    return (year - BASE_PERIOD[0]) * 12 + month - BASE_PERIOD[1]
+
+
+class Trends:
+    """Per-month factor arrays for one profile over the months of a run.
+
+    seasonality maps category names to twelve monthly multipliers and drift
+    to an annual rate; categories left out stay flat. inflation is an annual
+    rate applied to every category.
+    """
+
+    def __init__(
+        self,
+        category_names,
+        months,
+        seasonality=None,
+        drift=None,
+        inflation=0.0,
+        count_seasonality=None,
+        count_drift=0.0,
+    ):
+        seasonality = seasonality or {}
+        drift = drift or {}
+        flat = [1.0] * 12
+        curves = [seasonality.get(name, flat) for name in category_names]
+        growth = [
+            (1 + drift.get(name, 0.0)) * (1 + inflation) for name in category_names
+        ]
+        count_curve = count_seasonality or flat
+
+        self.months = {}
+        for year, month in months:
+            years = months_from_base(year, month) / 12
+            self.months[year, month] = MonthTrend(
+                count_curve[month - 1] * (1 + count_drift) ** years,
+                [curve[month - 1] * rate**years for curve, rate in zip(curves, growth)],
+            )
+
+    def for_month(self, year, month):
+        return self.months[year, month]
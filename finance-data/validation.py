@@ -0,0 +1,288 @@
+"""
+Schema validation for generated finance data.
+
+schema.json is compiled once into a check function per table, so validating
+a row is a fixed handful of type and membership tests rather than a walk
+over the schema. The validator follows the writer protocol (begin, then
+transactions month by month, then the remaining tables), so rows are checked
+inline as they stream past.
+
+Supported keywords: type, properties, required, items, enum, pattern and
+format ("date" for YYYY-MM-DD, "date-time"), plus "x-references", which names
+the table whose IDs a field must refer to. Optional fields may be null; the
+generator writes missing notes and locations that way.
+"""
+
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+TYPES = {
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+# Generated dates repeat heavily, so each distinct string is parsed once
+@lru_cache(maxsize=4096)
+def _is_date(value):
+    if not DATE_PATTERN.fullmatch(value):
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_date_time(value):
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+FORMATS = {"date": _is_date, "date-time": _is_date_time}
+
+
+_MISSING = object()
+
+
+class _CheckCompiler:
+    """Generate the source of a check function for one schema node.
+
+    Nested closures cost a function call per field per row, so the schema is
+    turned into straight-line Python instead and compiled with exec().
+    """
+
+    def __init__(self, references):
+        self.references = references
+        self.lines = []
+        self.namespace = {"_MISSING": _MISSING}
+        self.variables = 0
+
+    def constant(self, value):
+        name = f"_c{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def variable(self):
+        self.variables += 1
+        return f"v{self.variables}"
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+    def fail(self, depth, message, value=None, after=""):
+        """Emit a return of message, followed by the value expression and after."""
+        parts = [self.constant(message)]
+        if value is not None:
+            parts += [value, self.constant(after)]
+        self.emit(depth, f"return {' + '.join(parts)}")
+
+    def node(self, schema, var, path, depth):
+        """Emit the checks of one schema node against the variable var."""
+        type_names = schema.get("type") or []
+        if isinstance(type_names, str):
+            type_names = [type_names]
+        if type_names:
+            allowed = tuple(t for name in type_names for t in TYPES[name])
+            condition = f"not isinstance({var}, {self.constant(allowed)})"
+            # bool is an int subclass, so it would otherwise pass as a number
+            if "boolean" not in type_names and (
+                "number" in type_names or "integer" in type_names
+            ):
+                condition = f"isinstance({var}, bool) or {condition}"
+            self.emit(depth, f"if {condition}:")
+            expected = " or ".join(type_names)
+            self.fail(
+                depth + 1,
+                f"{path or 'row'}: expected {expected}, got ",
+                f"type({var}).__name__",
+            )
+        if "null" in type_names:
+            self.emit(depth, f"if {var} is not None:")
+            depth += 1
+            self.emit(depth, "pass")
+        is_string = type_names and set(type_names) <= {"string", "null"}
+
+        if "enum" in schema:
+            choices = frozenset(schema["enum"])
+            self.emit(depth, f"if {var} not in {self.constant(choices)}:")
+            self.fail(
+                depth + 1,
+                f"{path}: ",
+                f"repr({var})",
+                f" is not one of {sorted(choices)}",
+            )
+
+        checks = []
+        if "pattern" in schema:
+            pattern = re.compile(schema["pattern"])
+            checks.append(
+                (
+                    f"{self.constant(pattern)}.search",
+                    f"does not match {pattern.pattern}",
+                )
+            )
+        if schema.get("format") in FORMATS:
+            checks.append(
+                (
+                    self.constant(FORMATS[schema["format"]]),
+                    f"is not a valid {schema['format']}",
+                )
+            )
+        for function, problem in checks:
+            guard = "" if is_string else f"isinstance({var}, str) and "
+            self.emit(depth, f"if {guard}not {function}({var}):")
+            self.fail(depth + 1, f"{path}: ", f"repr({var})", f" {problem}")
+
+        if "x-references" in schema:
+            table = schema["x-references"]
+            ids = self.references.setdefault(table, set())
+            self.emit(depth, f"if {var} not in {self.constant(ids)}:")
+            self.fail(
+                depth + 1, f"{path}: ", f"repr({var})", f" is not a known {table} ID"
+            )
+
+        if "properties" in schema or "required" in schema:
+            self.object(schema, var, path, depth)
+        if "items" in schema:
+            self.emit(depth, f"if isinstance({var}, list):")
+            item = self.variable()
+            self.emit(depth + 1, f"for {item} in {var}:")
+            self.emit(depth + 2, "pass")
+            self.node(schema["items"], item, f"{path}[]", depth + 2)
+
+    def object(self, schema, var, path, depth):
+        self.emit(depth, f"if isinstance({var}, dict):")
+        depth += 1
+        self.emit(depth, "pass")
+        properties = schema.get("properties", {})
+        required = schema.get("required", [])
+        prefix = f"{path}." if path else ""
+        for name in list(properties) + [n for n in required if n not in properties]:
+            field = self.variable()
+            self.emit(depth, f"{field} = {var}.get({name!r}, _MISSING)")
+            if name in required:
+                self.emit(depth, f"if {field} is _MISSING:")
+                self.fail(depth + 1, f"{path or 'row'}: missing {name}")
+                field_depth = depth
+            else:
+                # Optional fields may be null as well as absent
+                self.emit(depth, f"if {field} is not _MISSING and {field} is not None:")
+                self.emit(depth + 1, "pass")
+                field_depth = depth + 1
+            if name in properties:
+                self.node(properties[name], field, prefix + name, field_depth)
+
+
+def compile_schema(schema, references):
+    """Compile a schema node into a function returning an error message or None.
+
+    references maps a table name to the set of its IDs; the sets are filled
+    in later, so the compiled checks always see the current user's IDs.
+    """
+    compiler = _CheckCompiler(references)
+    compiler.emit(0, "def check(v0):")
+    compiler.node(schema, "v0", "", 1)
+    compiler.emit(1, "return None")
+    exec("\n".join(compiler.lines), compiler.namespace)
+    return compiler.namespace["check"]
+
+
+class SchemaValidator:
+    """Check rows against schema.json as they are written.
+
+    With sample_rate below 1, every Nth transaction is checked (N being
+    1 / sample_rate); the other tables are small and always checked in full.
+    """
+
+    max_reported = 10
+
+    def __init__(self, schema, sample_rate=1.0):
+        self.references = {}
+        self.tables = {
+            name: compile_schema(table["items"], self.references)
+            for name, table in schema.get("properties", {}).items()
+            if table.get("type") == "array" and "items" in table
+        }
+        self.step = max(1, round(1 / sample_rate))
+        self.offset = 0
+        self.checked = 0
+        self.invalid = 0
+        self.errors = []
+
+    def use_references(self, **tables):
+        """Record the IDs that rows may refer to, one table name per keyword."""
+        for name, rows in tables.items():
+            # Compiled checks hold these sets, so they are refilled in place
+            ids = self.references.setdefault(name, set())
+            ids.clear()
+            ids.update(row.get("id") for row in rows if isinstance(row, dict))
+
+    def begin(self, accounts, categories, recurring_transactions):
+        """Record the IDs that rows may refer to and check the static tables."""
+        self.use_references(
+            accounts=accounts,
+            categories=categories,
+            recurring_transactions=recurring_transactions,
+        )
+        self.check_rows("accounts", accounts)
+        self.check_rows("categories", categories)
+        self.check_rows("recurring_transactions", recurring_transactions)
+
+    def write_transactions(self, transactions):
+        """Check the sampled transactions of a batch; return how many are invalid."""
+        sampled = transactions[self.offset :: self.step]
+        self.offset = (self.offset - len(transactions)) % self.step
+        return self.check_rows("transactions", sampled)
+
+    def check_shard(self, accounts, categories, transactions):
+        """Check one month of transactions on its own, as a parallel worker does.
+
+        Sampling restarts with every month. Returns (checked, invalid, errors)
+        for merge() in the process that owns the report.
+        """
+        self.use_references(accounts=accounts, categories=categories)
+        self.offset = self.checked = self.invalid = 0
+        self.errors = []
+        self.write_transactions(transactions)
+        return self.checked, self.invalid, self.errors
+
+    def merge(self, checked, invalid, errors):
+        """Add the counts of a check_shard() call; return how many were invalid."""
+        self.checked += checked
+        self.invalid += invalid
+        self.errors.extend(errors[: max(0, self.max_reported - len(self.errors))])
+        return invalid
+
+    def end(self, tables):
+        """Check the tables derived from spending that the schema describes."""
+        for name, rows in tables.items():
+            self.check_rows(name, rows)
+
+    def check_rows(self, table, rows):
+        """Check rows of a table; return how many are invalid."""
+        check = self.tables.get(table)
+        if check is None:
+            return 0
+        invalid = 0
+        for row in rows:
+            error = check(row)
+            if error:
+                invalid += 1
+                if len(self.errors) < self.max_reported:
+                    row_id = row.get("id") if isinstance(row, dict) else None
+                    self.errors.append(f"{table} {row_id}: {error}")
+        self.checked += len(rows)
+        self.invalid += invalid
+        return invalid
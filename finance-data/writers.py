@@ -0,0 +1,942 @@
+"""
+Output writers for generated finance data.
+
+Every writer receives a dataset in three steps: the small static tables first
+(begin), then transactions one month at a time (write_transactions), and the
+tables derived from spending (budgets, goals, aggregates) last (end). Tables
+that grow month by month alongside transactions (balance snapshots) arrive
+through write_rows as they are produced. Streaming writers put each month on
+disk as soon as it arrives, so peak memory does not grow with dataset size.
+
+Writers with shared_across_users set receive every user of a scale-mode run
+through begin/end on a single instance and are finished with close(); the
+others write one file per user.
+
+Text formats can also encode a month apart from any writer instance
+(encode_transactions), which parallel workers do, leaving the writer only
+write_encoded to copy the result to disk.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import date
+
+import binary_store
+
+# Compact separators for streamed output; indentation roughly doubles file size
+COMPACT = (",", ":")
+
+
+class Writer:
+    """Base class for writers that produce one file per dataset."""
+
+    extension = ""
+    shared_across_users = False
+    supports_append = False
+
+    def close(self):
+        """Finish the output; per-dataset writers are already done after end()."""
+
+    @classmethod
+    def encode_transactions(cls, transactions):
+        """Return a month's transactions encoded for write_encoded, or None.
+
+        None means the format cannot encode rows without the writer's state
+        (a string table, a database), so they go through write_transactions.
+        """
+
+    def write_encoded(self, transactions, encoded):
+        """Write transactions already encoded by encode_transactions."""
+        raise NotImplementedError
+
+    def write_rows(self, table, rows):
+        """Stream rows of a table produced month by month, such as balance snapshots.
+
+        They are parked in a temporary file until end() writes them out, so
+        they do not pile up in memory.
+        """
+        self.spill.add(table, rows)
+
+    @classmethod
+    def sidecar_path(cls, path, suffix):
+        """Return the path of a file that accompanies output at path."""
+        if cls.extension and path.endswith(cls.extension):
+            return path.removesuffix(cls.extension) + suffix
+        return os.path.splitext(path)[0] + suffix
+
+
+class RowSpill:
+    """Temporary NDJSON files holding streamed table rows until end()."""
+
+    def __init__(self):
+        self.files = {}
+
+    def add(self, table, rows):
+        f = self.files.get(table)
+        if f is None:
+            f = self.files[table] = tempfile.TemporaryFile("w+")
+        f.writelines(json.dumps(row, separators=COMPACT) + "\n" for row in rows)
+
+    def write_members(self, out, tables, first=True):
+        """Write tables and the spilled ones as compact JSON object members.
+
+        A spilled table's rows follow any rows tables already has for it
+        (those of an appended dataset), and are copied a line at a time.
+        """
+        names = list(tables) + [name for name in self.files if name not in tables]
+        for name in names:
+            out.write(("" if first else ",") + json.dumps(name) + ":")
+            first = False
+            if name not in self.files:
+                out.write(json.dumps(tables[name], separators=COMPACT))
+                continue
+            separator = ""
+            out.write("[")
+            for row in tables.get(name, ()):
+                out.write(separator + json.dumps(row, separators=COMPACT))
+                separator = ","
+            f = self.files[name]
+            f.seek(0)
+            for line in f:
+                out.write(separator + line.rstrip("\n"))
+                separator = ","
+            out.write("]")
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+
+class JsonWriter(Writer):
+    """Buffer the whole dataset and write it as indented JSON.
+
+    This is the format of the checked-in generated_finance_data.json, which
+    the services read directly.
+    """
+
+    extension = ".json"
+
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.streamed = {}
+
+    def begin(self, accounts, categories, recurring_transactions):
+        self.data = {
+            "transactions": [],
+            "accounts": accounts,
+            "budgets": [],
+            "categories": categories,
+            "recurring_transactions": recurring_transactions,
+            "financial_goals": [],
+        }
+
+    def write_transactions(self, transactions):
+        self.data["transactions"].extend(transactions)
+
+    def write_rows(self, table, rows):
+        # The whole document is held until end() anyway
+        self.streamed.setdefault(table, []).extend(rows)
+
+    def end(self, tables):
+        self.data.update(tables)
+        self.data.update(self.streamed)
+        with open(self.path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        self.data = None
+        self.streamed = {}
+
+
+class StreamingJsonWriter(Writer):
+    """Write the dataset as one compact JSON object, streaming the transactions.
+
+    The static tables are written before the transactions array and the
+    spending-derived tables after it, so nothing is held back in memory.
+    """
+
+    extension = ".json"
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.first = True
+        self.spill = RowSpill()
+
+    def begin(self, accounts, categories, recurring_transactions):
+        self.file = open(self.path, "w")
+        self.file.write("{")
+        for key, value in (
+            ("accounts", accounts),
+            ("categories", categories),
+            ("recurring_transactions", recurring_transactions),
+        ):
+            self.file.write(f'"{key}":{json.dumps(value, separators=COMPACT)},')
+        self.file.write('"transactions":[')
+        self.first = True
+
+    @classmethod
+    def encode_transactions(cls, transactions):
+        return ",".join(json.dumps(t, separators=COMPACT) for t in transactions)
+
+    def write_transactions(self, transactions):
+        self.write_encoded(transactions, self.encode_transactions(transactions))
+
+    def write_encoded(self, transactions, encoded):
+        if not transactions:
+            return
+        if not self.first:
+            self.file.write(",")
+        self.file.write(encoded)
+        self.first = False
+
+    def end(self, tables):
+        self.file.write("]")
+        self.spill.write_members(self.file, tables, first=False)
+        self.spill.close()
+        self.file.write("}")
+        self.file.close()
+        self.file = None
+
+
+class NdjsonWriter(Writer):
+    """Write one transaction per line, with the other tables in a sidecar file.
+
+    For an output of data.ndjson the remaining tables go to data.tables.json.
+
+    With append=True new transactions are added to the end of the existing
+    file and the rows passed to end() extend the existing sidecar tables, so
+    adding months costs O(new data) rather than a full rewrite.
+    """
+
+    extension = ".ndjson"
+    supports_append = True
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.tables_path = self.sidecar_path(path)
+        self.append = append
+        self.file = None
+        self.tables = None
+        self.spill = RowSpill()
+
+    @classmethod
+    def sidecar_path(cls, path, suffix=".tables.json"):
+        return super().sidecar_path(path, suffix)
+
+    @classmethod
+    def load_existing(cls, path):
+        """Return the sidecar tables and the date of the last transaction."""
+        with open(cls.sidecar_path(path)) as f:
+            tables = json.load(f)
+        last_line = _read_last_line(path)
+        if not last_line:
+            raise SystemExit(f"Cannot append: {path} has no transactions")
+        return tables, json.loads(last_line)["date"]
+
+    def begin(self, accounts, categories, recurring_transactions):
+        if self.append:
+            self.file = open(self.path, "a")
+            with open(self.tables_path) as f:
+                self.tables = json.load(f)
+            return
+        self.file = open(self.path, "w")
+        self.tables = {
+            "accounts": accounts,
+            "categories": categories,
+            "recurring_transactions": recurring_transactions,
+        }
+
+    @classmethod
+    def encode_transactions(cls, transactions):
+        return "".join(json.dumps(t, separators=COMPACT) + "\n" for t in transactions)
+
+    def write_transactions(self, transactions):
+        self.write_encoded(transactions, self.encode_transactions(transactions))
+
+    def write_encoded(self, transactions, encoded):
+        self.file.write(encoded)
+
+    def end(self, tables):
+        self.file.close()
+        self.file = None
+        for name, rows in tables.items():
+            if self.append and name in self.tables:
+                self.tables[name].extend(rows)
+            else:
+                self.tables[name] = rows
+        with open(self.tables_path, "w") as f:
+            f.write("{")
+            self.spill.write_members(f, self.tables)
+            f.write("}")
+        self.spill.close()
+        self.tables = None
+
+
+def _gzip_codec():
+    import gzip
+
+    # mtime=0 keeps frames byte-identical between runs
+    return (lambda data: gzip.compress(data, mtime=0)), gzip.decompress
+
+
+def _zstd_codec():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise SystemExit(
+            "zstd output requires zstandard: pip install 'generate-data[zstd]'"
+        ) from exc
+    return (
+        zstandard.ZstdCompressor(level=3).compress,
+        zstandard.ZstdDecompressor().decompress,
+    )
+
+
+class CompressedNdjsonWriter(NdjsonWriter):
+    """Write NDJSON compressed into one independent frame per month.
+
+    Frames are concatenated, so data.ndjson.gz is still an ordinary gzip (or
+    zstd) stream, and data.index.json records each frame's month, byte
+    offset, length and row count, so a reader can seek to the months it
+    needs and decompress only those (see read_months). The other tables go
+    to data.tables.json, as with NdjsonWriter, and appending adds frames.
+    """
+
+    codec_name = None
+    codec = None
+
+    def __init__(self, path, append=False):
+        super().__init__(path, append)
+        self.compress, self.decompress = self.codec()
+        self.index_path = self.sidecar_path(path, ".index.json")
+        self.frames = []
+        self.offset = 0
+
+    @classmethod
+    def load_index(cls, path):
+        with open(cls.sidecar_path(path, ".index.json")) as f:
+            return json.load(f)["frames"]
+
+    @classmethod
+    def read_months(cls, path, periods=None):
+        """Yield the transactions of the given YYYY-MM periods (default: all).
+
+        Only the frames of those months are read and decompressed.
+        """
+        _, decompress = cls.codec()
+        wanted = None if periods is None else set(periods)
+        with open(path, "rb") as f:
+            for frame in cls.load_index(path):
+                if wanted is not None and frame["period"] not in wanted:
+                    continue
+                f.seek(frame["offset"])
+                for line in decompress(f.read(frame["length"])).splitlines():
+                    yield json.loads(line)
+
+    @classmethod
+    def load_existing(cls, path):
+        """Return the sidecar tables and the date of the last transaction."""
+        with open(cls.sidecar_path(path)) as f:
+            tables = json.load(f)
+        frames = cls.load_index(path)
+        if not frames:
+            raise SystemExit(f"Cannot append: {path} has no transactions")
+        last = list(cls.read_months(path, [frames[-1]["period"]]))
+        return tables, last[-1]["date"]
+
+    def begin(self, accounts, categories, recurring_transactions):
+        if self.append:
+            with open(self.tables_path) as f:
+                self.tables = json.load(f)
+            self.frames = self.load_index(self.path)
+            self.file = open(self.path, "ab")
+            self.offset = self.file.tell()
+            return
+        self.file = open(self.path, "wb")
+        self.tables = {
+            "accounts": accounts,
+            "categories": categories,
+            "recurring_transactions": recurring_transactions,
+        }
+
+    @staticmethod
+    def _frames(compress, transactions):
+        """Compress transactions into one (period, frame, rows) per month."""
+        frames = []
+        start = 0
+        # Batches are date-sorted, so each month is one run of rows
+        while start < len(transactions):
+            period = transactions[start]["date"][:7]
+            end = start
+            while end < len(transactions) and transactions[end]["date"][:7] == period:
+                end += 1
+            frame = compress(
+                "".join(
+                    json.dumps(t, separators=COMPACT) + "\n"
+                    for t in transactions[start:end]
+                ).encode("utf-8")
+            )
+            frames.append((period, frame, end - start))
+            start = end
+        return frames
+
+    @classmethod
+    def encode_transactions(cls, transactions):
+        compress, _ = cls.codec()
+        return cls._frames(compress, transactions)
+
+    def write_transactions(self, transactions):
+        self.write_encoded(transactions, self._frames(self.compress, transactions))
+
+    def write_encoded(self, transactions, encoded):
+        for period, frame, rows in encoded:
+            self.file.write(frame)
+            self.frames.append(
+                {
+                    "period": period,
+                    "offset": self.offset,
+                    "length": len(frame),
+                    "rows": rows,
+                }
+            )
+            self.offset += len(frame)
+
+    def end(self, tables):
+        with open(self.index_path, "w") as f:
+            json.dump({"codec": self.codec_name, "frames": self.frames}, f, indent=2)
+        self.frames = []
+        super().end(tables)
+
+
+class GzipNdjsonWriter(CompressedNdjsonWriter):
+    """Per-month gzip frames, using only the standard library."""
+
+    extension = ".ndjson.gz"
+    codec_name = "gzip"
+    codec = staticmethod(_gzip_codec)
+
+
+class ZstdNdjsonWriter(CompressedNdjsonWriter):
+    """Per-month zstd frames; requires zstandard (install the "zstd" extra)."""
+
+    extension = ".ndjson.zst"
+    codec_name = "zstd"
+    codec = staticmethod(_zstd_codec)
+
+
+class ParquetWriter(Writer):
+    """Write transactions as a Parquet dataset partitioned by month.
+
+    Transactions go to <path>/transactions/month=YYYY-MM/part-0.parquet
+    (Hive-style partitioning, so readers can prune to the months they need) with
+    dictionary-encoded category, account, type and merchant columns and a
+    date32 date column. Rows are buffered and flushed as row groups once
+    max_buffered_rows is reached, keeping one file open per month. The other
+    tables are appended to <path>/<table>.ndjson. Every row carries a user
+    column, the position of its user in the run, since all users share the
+    dataset.
+
+    A previous dataset in <path> is removed first, so no stale months or
+    tables survive a rerun; a directory holding anything else is refused.
+
+    Requires pyarrow (install the "parquet" extra).
+    """
+
+    extension = ".parquet"
+    shared_across_users = True
+    max_buffered_rows = 250_000
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise SystemExit(
+                "Parquet output requires pyarrow: pip install 'generate-data[parquet]'"
+            ) from exc
+
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.schema = pa.schema(
+            [
+                ("user", pa.int32()),
+                ("id", pa.string()),
+                ("date", pa.date32()),
+                ("description", pa.string()),
+                ("amount", pa.float64()),
+                ("category", pa.dictionary(pa.int32(), pa.string())),
+                ("account", pa.dictionary(pa.int32(), pa.string())),
+                ("type", pa.dictionary(pa.int8(), pa.string())),
+                ("tags", pa.list_(pa.string())),
+                ("merchant", pa.dictionary(pa.int32(), pa.string())),
+                ("merchant_location", pa.string()),
+                ("notes", pa.string()),
+            ]
+        )
+        # {month: [(user, transaction)]}
+        self.buffers = {}
+        self.buffered_rows = 0
+        self.partition_writers = {}
+        self.table_files = {}
+        self.user = -1
+        self._remove_previous_dataset(path)
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def _remove_previous_dataset(path):
+        if not os.path.isdir(path):
+            return
+        entries = os.listdir(path)
+        foreign = [
+            name
+            for name in entries
+            if not (
+                name.endswith(".ndjson")
+                and os.path.isfile(os.path.join(path, name))
+                or name == "transactions"
+                and os.path.isdir(os.path.join(path, name))
+            )
+        ]
+        if foreign:
+            raise SystemExit(
+                f"Cannot write Parquet to {path}: it holds {foreign[0]}, which is "
+                "not part of a Parquet dataset; choose an empty directory"
+            )
+        for name in entries:
+            if name == "transactions":
+                shutil.rmtree(os.path.join(path, name))
+            else:
+                os.remove(os.path.join(path, name))
+
+    def _append_table(self, name, rows):
+        if name not in self.table_files:
+            self.table_files[name] = open(
+                os.path.join(self.path, f"{name}.ndjson"), "w"
+            )
+        self.table_files[name].writelines(
+            json.dumps({"user": self.user, **row}, separators=COMPACT) + "\n"
+            for row in rows
+        )
+
+    def begin(self, accounts, categories, recurring_transactions):
+        # Users arrive one after another, each starting with begin()
+        self.user += 1
+        self._append_table("accounts", accounts)
+        self._append_table("categories", categories)
+        self._append_table("recurring_transactions", recurring_transactions)
+
+    def write_transactions(self, transactions):
+        for t in transactions:
+            month_key = t["date"][:7]
+            if month_key not in self.buffers:
+                self.buffers[month_key] = []
+            self.buffers[month_key].append((self.user, t))
+        self.buffered_rows += len(transactions)
+        if self.buffered_rows >= self.max_buffered_rows:
+            self.flush()
+
+    def write_rows(self, table, rows):
+        self._append_table(table, rows)
+
+    def end(self, tables):
+        for name, rows in tables.items():
+            self._append_table(name, rows)
+
+    def flush(self):
+        """Write every buffered month as a row group of its partition file."""
+        for month_key, rows in self.buffers.items():
+            if month_key not in self.partition_writers:
+                partition_dir = os.path.join(
+                    self.path, "transactions", f"month={month_key}"
+                )
+                os.makedirs(partition_dir, exist_ok=True)
+                self.partition_writers[month_key] = self.pq.ParquetWriter(
+                    os.path.join(partition_dir, "part-0.parquet"), self.schema
+                )
+            self.partition_writers[month_key].write_table(self._to_table(rows))
+        self.buffers = {}
+        self.buffered_rows = 0
+
+    def _to_table(self, buffered):
+        pa = self.pa
+        rows = [t for _, t in buffered]
+        merchants = [t.get("merchant") or {} for t in rows]
+        columns = {
+            "user": [user for user, _ in buffered],
+            "id": [t["id"] for t in rows],
+            # fromisoformat is exact for the generator's YYYY-MM-DD dates
+            "date": [date.fromisoformat(t["date"]) for t in rows],
+            "description": [t["description"] for t in rows],
+            "amount": [t["amount"] for t in rows],
+            "category": [t["category"] for t in rows],
+            "account": [t["account"] for t in rows],
+            "type": [t["type"] for t in rows],
+            "tags": [t.get("tags") for t in rows],
+            "merchant": [m.get("name") for m in merchants],
+            "merchant_location": [m.get("location") for m in merchants],
+            "notes": [t.get("notes") for t in rows],
+        }
+        arrays = []
+        for field in self.schema:
+            values = columns[field.name]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(
+                    pa.array(values, pa.string()).dictionary_encode().cast(field.type)
+                )
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def close(self):
+        self.flush()
+        for writer in self.partition_writers.values():
+            writer.close()
+        for f in self.table_files.values():
+            f.close()
+        self.partition_writers = {}
+        self.table_files = {}
+
+
+class SqliteWriter(Writer):
+    """Write the dataset as a normalized SQLite database.
+
+    Transactions reference their category, account and merchant by key, and
+    tags live in a transaction_tags table. Every row is inserted with
+    executemany inside one transaction, and the indexes on (date),
+    (category, date) and (account, date) are built once at the end, which is
+    much faster than maintaining them row by row. Tables without a fixed
+    layout here (aggregates, balance snapshots) get one column per field.
+    """
+
+    extension = ".sqlite"
+    # Columns of the fixed tables, in insert order
+    columns = {
+        "accounts": (
+            "id TEXT PRIMARY KEY",
+            "name TEXT NOT NULL",
+            "type TEXT NOT NULL",
+            "balance REAL NOT NULL",
+            "credit_limit REAL",
+            "currency TEXT NOT NULL",
+            "institution TEXT NOT NULL",
+            "last_updated TEXT",
+        ),
+        "categories": (
+            "id TEXT PRIMARY KEY",
+            "name TEXT NOT NULL",
+            "type TEXT NOT NULL",
+            "parent TEXT REFERENCES categories(id)",
+            "icon TEXT",
+            "color TEXT",
+        ),
+        "recurring_transactions": (
+            "id TEXT PRIMARY KEY",
+            "description TEXT NOT NULL",
+            "amount REAL NOT NULL",
+            "category TEXT NOT NULL REFERENCES categories(id)",
+            "account TEXT REFERENCES accounts(id)",
+            "frequency TEXT NOT NULL",
+            "next_date TEXT NOT NULL",
+            "auto_pay INTEGER",
+        ),
+        "merchants": (
+            "id INTEGER PRIMARY KEY",
+            "name TEXT NOT NULL",
+            "location TEXT",
+        ),
+        "transactions": (
+            "id TEXT PRIMARY KEY",
+            "date TEXT NOT NULL",
+            "description TEXT NOT NULL",
+            "amount REAL NOT NULL",
+            "category TEXT NOT NULL REFERENCES categories(id)",
+            "account TEXT NOT NULL REFERENCES accounts(id)",
+            "type TEXT NOT NULL",
+            "merchant INTEGER REFERENCES merchants(id)",
+            "notes TEXT",
+        ),
+        "transaction_tags": (
+            "transaction_id TEXT NOT NULL REFERENCES transactions(id)",
+            "tag TEXT NOT NULL",
+        ),
+        "budgets": (
+            "id TEXT PRIMARY KEY",
+            "category TEXT NOT NULL REFERENCES categories(id)",
+            "monthly_limit REAL NOT NULL",
+            "spent REAL NOT NULL",
+            "remaining REAL NOT NULL",
+            "period TEXT NOT NULL",
+        ),
+        "financial_goals": (
+            "id TEXT PRIMARY KEY",
+            "name TEXT NOT NULL",
+            "target_amount REAL NOT NULL",
+            "current_amount REAL NOT NULL",
+            "deadline TEXT",
+            "status TEXT NOT NULL",
+            "monthly_contribution REAL",
+        ),
+    }
+    indexes = {
+        "transactions_date": "transactions (date)",
+        "transactions_category_date": "transactions (category, date)",
+        "transactions_account_date": "transactions (account, date)",
+        "transaction_tags_transaction": "transaction_tags (transaction_id)",
+        "budgets_category_period": "budgets (category, period)",
+    }
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = None
+        # (name, location) -> merchant key
+        self.merchants = {}
+        self.merchant_sql = self._insert_sql("merchants", self._names("merchants"))
+        self.transaction_sql = self._insert_sql(
+            "transactions", self._names("transactions")
+        )
+        self.tag_sql = self._insert_sql(
+            "transaction_tags", self._names("transaction_tags")
+        )
+
+    @classmethod
+    def _names(cls, table):
+        return [column.split()[0] for column in cls.columns[table]]
+
+    @staticmethod
+    def _insert_sql(table, names):
+        placeholders = ", ".join("?" * len(names))
+        return f"INSERT INTO {table} ({', '.join(names)}) VALUES ({placeholders})"
+
+    def _insert_rows(self, table, rows):
+        """Insert rows of a fixed table, taking each column from the field of its name."""
+        names = self._names(table)
+        self.connection.executemany(
+            self._insert_sql(table, names),
+            ([row.get(name) for name in names] for row in rows),
+        )
+
+    def _insert_table(self, table, rows):
+        """Create a table with one column per field of its rows and insert them."""
+        if not rows:
+            return
+        names = list(rows[0])
+        columns = ", ".join(f'"{name}"' for name in names)
+        self.connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+        self.connection.executemany(
+            self._insert_sql(f'"{table}"', [f'"{name}"' for name in names]),
+            (
+                [
+                    json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for value in map(row.get, names)
+                ]
+                for row in rows
+            ),
+        )
+
+    def begin(self, accounts, categories, recurring_transactions):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        # Autocommit mode, so the single transaction below is explicit
+        self.connection = sqlite3.connect(self.path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute("BEGIN")
+        for table, columns in self.columns.items():
+            self.connection.execute(f"CREATE TABLE {table} ({', '.join(columns)})")
+        self._insert_rows("accounts", accounts)
+        self._insert_rows("categories", categories)
+        self._insert_rows("recurring_transactions", recurring_transactions)
+
+    def write_transactions(self, transactions):
+        rows = []
+        new_merchants = []
+        for t in transactions:
+            merchant = t.get("merchant")
+            merchant_id = None
+            if merchant:
+                key = (merchant.get("name"), merchant.get("location"))
+                merchant_id = self.merchants.get(key)
+                if merchant_id is None:
+                    merchant_id = self.merchants[key] = len(self.merchants) + 1
+                    new_merchants.append((merchant_id, *key))
+            rows.append(
+                (
+                    t["id"],
+                    t["date"],
+                    t["description"],
+                    t["amount"],
+                    t["category"],
+                    t["account"],
+                    t["type"],
+                    merchant_id,
+                    t.get("notes"),
+                )
+            )
+        self.connection.executemany(self.merchant_sql, new_merchants)
+        self.connection.executemany(self.transaction_sql, rows)
+        self.connection.executemany(
+            self.tag_sql,
+            ((t["id"], tag) for t in transactions for tag in t.get("tags") or ()),
+        )
+
+    def write_rows(self, table, rows):
+        if table in self.columns:
+            self._insert_rows(table, rows)
+        else:
+            self._insert_table(table, rows)
+
+    def end(self, tables):
+        for name, rows in tables.items():
+            if name in self.columns:
+                self._insert_rows(name, rows)
+            else:
+                self._insert_table(name, rows)
+        for name, target in self.indexes.items():
+            self.connection.execute(f"CREATE INDEX {name} ON {target}")
+        self.connection.execute("COMMIT")
+        self.connection.execute("ANALYZE")
+        self.connection.close()
+        self.connection = None
+        self.merchants = {}
+
+
+class BinaryWriter(Writer):
+    """Write transactions as fixed-width binary records (see binary_store.py).
+
+    Months arrive in date order and each month is date-sorted, so records are
+    written as they come and the month index is just each month's first
+    record and row count. Strings are interned into the string table, which
+    is the only part that grows with distinct values rather than rows.
+    """
+
+    extension = ".bin"
+
+    @classmethod
+    def sidecar_path(cls, path, suffix):
+        return binary_store.sidecar_path(path, suffix)
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.tables = None
+        self.strings = {}
+        self.months = {}
+        self.rows = 0
+        self.id_format = None
+        self.spill = RowSpill()
+
+    def _code(self, value):
+        if value is None:
+            return binary_store.NONE
+        code = self.strings.get(value)
+        if code is None:
+            code = self.strings[value] = len(self.strings)
+        return code
+
+    def begin(self, accounts, categories, recurring_transactions):
+        self.file = open(self.path, "wb")
+        self.tables = {
+            "accounts": accounts,
+            "categories": categories,
+            "recurring_transactions": recurring_transactions,
+        }
+
+    def write_transactions(self, transactions):
+        if not transactions:
+            return
+        if self.id_format is None:
+            self.id_format = "int" if transactions[0]["id"].isdigit() else "uuid"
+        code = self._code
+        pack = binary_store.RECORD.pack
+        records = []
+        day_cache = {}
+        for t in transactions:
+            day = day_cache.get(t["date"])
+            if day is None:
+                day = day_cache[t["date"]] = binary_store.day_number(t["date"])
+            merchant = t.get("merchant") or {}
+            tags = t.get("tags")
+            records.append(
+                pack(
+                    day,
+                    round(t["amount"] * 100),
+                    code(t["category"]),
+                    code(t["account"]),
+                    code(merchant.get("name")),
+                    code(merchant.get("location")),
+                    code(t["description"]),
+                    code(binary_store.TAG_SEPARATOR.join(tags) if tags else None),
+                    code(t.get("notes")),
+                    t["type"] == "credit",
+                    binary_store.encode_id(t["id"]),
+                )
+            )
+            period = t["date"][:7]
+            month = self.months.get(period)
+            if month is None:
+                month = self.months[period] = {"start": self.rows, "rows": 0}
+            month["rows"] += 1
+            self.rows += 1
+        self.file.write(b"".join(records))
+
+    def end(self, tables):
+        self.file.close()
+        self.file = None
+        self.tables.update(tables)
+        with open(self.sidecar_path(self.path, ".tables.json"), "w") as f:
+            f.write("{")
+            self.spill.write_members(f, self.tables)
+            f.write("}")
+        self.spill.close()
+        outputs = {
+            ".strings.json": list(self.strings),
+            ".index.json": {
+                "record_size": binary_store.RECORD.size,
+                "struct": binary_store.RECORD.format,
+                "fields": binary_store.FIELDS,
+                "id_format": self.id_format or "uuid",
+                "rows": self.rows,
+                "months": self.months,
+            },
+        }
+        for suffix, data in outputs.items():
+            with open(self.sidecar_path(self.path, suffix), "w") as f:
+                json.dump(data, f, separators=COMPACT)
+        self.tables = None
+        self.strings = {}
+        self.months = {}
+        self.rows = 0
+
+
+def _read_last_line(path, chunk_size=4096):
+    """Read the last non-empty line of a text file without scanning all of it."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0:
+            step = min(chunk_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+            lines = data.rstrip(b"\n").split(b"\n")
+            if len(lines) > 1 or position == 0:
+                return lines[-1].decode("utf-8")
+    return ""
+
+
+WRITERS = {
+    "binary": BinaryWriter,
+    "json": JsonWriter,
+    "json-stream": StreamingJsonWriter,
+    "ndjson": NdjsonWriter,
+    "ndjson-gzip": GzipNdjsonWriter,
+    "ndjson-zstd": ZstdNdjsonWriter,
+    "parquet": ParquetWriter,
+    "sqlite": SqliteWriter,
+}